@@ -0,0 +1,82 @@
+"""Peak memory benchmark for library_parser.py on a synthetic library.
+
+Generates a throwaway BoothDownloaderOut with fake _BoothPage.json items and
+Binary folders, then runs a cold build and an incremental rebuild (translation
+and image optimization disabled) and reports peak RSS per 10k items.
+
+Usage: python benchmark_memory.py [--items 10000] [--files 25] [--parser library_parser.py]
+Unix only, peak RSS is read from os.wait4().
+"""
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def fake_text(rng, length):
+    kana = "あいうえおかきくけこさしすせそたちつてとなにぬねのアイウエオカキクケコサシスセソ衣装対応髪型"
+    return "".join(rng.choice(kana) for _ in range(length))
+
+def fake_page(rng, item_id):
+    images = [{"caption": None, "original": f"https://booth.pximg.net/c/{item_id}/{rng.getrandbits(64):016x}-{i:04d}-4aa1-9c1f-0e9d7b2ad3f1_base_resized.jpg",
+               "resized": f"https://booth.pximg.net/c/72x72_a2_g5/{item_id}/{i}.jpg"} for i in range(8)]
+    tags = [{"name": rng.choice(["VRChat", "衣装", "3D衣装", "Moe対応", "髪型", "アクセサリー"]) + str(rng.randint(0, 300)), "url": f"https://booth.pm/ja/browse?tags%5B%5D={i}"} for i in range(12)]
+    variations = [{"name": f"{fake_text(rng, 6)} Ver{i}", "price": 1500, "status": "digital", "type": "digital", "buyee_html": None, "order_url": None} for i in range(6)]
+    is_avatar = rng.random() < 0.05
+    return {
+        "id": item_id, "name": f"【{fake_text(rng, 8)}】Outfit {item_id}", "description": fake_text(rng, 1500),
+        "price": f"¥ {rng.randint(0, 8000):,}", "url": f"https://booth.pm/ja/items/{item_id}", "wish_lists_count": rng.randint(0, 5000),
+        "is_adult": rng.random() < 0.1, "category": {"id": 208 if is_avatar else 217, "name": "3Dキャラクター" if is_avatar else "3D衣装"},
+        "shop": {"name": f"Shop {rng.randint(0, 400)}", "subdomain": "shop", "thumbnail_url": "https://booth.pximg.net/c/48x48/users/1/icon.png"},
+        "images": images, "tags": tags, "variations": variations,
+        "tag_banners": [{"image": {"original": "https://booth.pximg.net/banner.png"}, "name": t["name"], "url": t["url"]} for t in tags],
+        "share": {"hashtags": ["booth_pm"], "text": fake_text(rng, 40)},
+    }
+
+def build_library(root, items, files_per_item):
+    rng = random.Random(items)
+    out = os.path.join(root, "BoothDownloaderOut")
+    for i in range(items):
+        item_id = str(1000000 + i)
+        binary = os.path.join(out, item_id, "Binary", "Assets", "Textures")
+        os.makedirs(binary)
+        with open(os.path.join(out, item_id, "_BoothPage.json"), "w", encoding="utf-8") as f: json.dump(fake_page(rng, int(item_id)), f, ensure_ascii=False)
+        for n in range(files_per_item):
+            with open(os.path.join(binary, f"texture_{n:03d}.png"), "wb") as f: f.truncate(rng.randint(1, 1 << 20))
+
+def run_build(workdir):
+    proc = subprocess.Popen([sys.executable, "library_parser.py"], cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    if status != 0: raise RuntimeError(f"library_parser.py exited with status {status}")
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--files", type=int, default=25, help="files per item Binary folder")
+    parser.add_argument("--parser", default=os.path.join(SCRIPT_DIR, "library_parser.py"))
+    args = parser.parse_args()
+    if not hasattr(os, "wait4"): sys.exit("This benchmark needs os.wait4 (Linux/macOS).")
+
+    workdir = tempfile.mkdtemp(prefix="booth_membench_")
+    try:
+        print(f"Generating {args.items} items with {args.files} files each in {workdir}...")
+        build_library(workdir, args.items, args.files)
+        shutil.copytree(os.path.join(SCRIPT_DIR, "web_data"), os.path.join(workdir, "web_data"), ignore=shutil.ignore_patterns("cache", "img"))
+        with open(args.parser, "r", encoding="utf-8") as f: source = f.read()
+        source = source.replace("SKIP_TRANSLATION = False", "SKIP_TRANSLATION = True").replace("OPTIMIZE_THUMBNAILS = True", "OPTIMIZE_THUMBNAILS = False").replace("BLUR_LAYERS = True", "BLUR_LAYERS = False")
+        with open(os.path.join(workdir, "library_parser.py"), "w", encoding="utf-8") as f: f.write(source)
+        per_10k = 10000 / args.items
+        for label in ("cold build", "incremental rebuild"):
+            rss = run_build(workdir)
+            print(f"{label:>20}: peak RSS {rss / 2**20:8.1f} MiB ({rss / 2**20 * per_10k:8.1f} MiB per 10k items)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
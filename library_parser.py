@@ -1,15 +1,27 @@
+import io
 import os
 import json
 import glob
 import re
 import sys
+import time
+import unicodedata
+import zlib
+import random
+import struct
+import base64
 import binascii
+import hashlib
 import logging
+import zipfile
+import argparse
 import traceback
-from urllib.parse import quote, unquote
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse
+from urllib.request import url2pathname
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from deep_translator import GoogleTranslator
-from PIL import Image
+from PIL import Image, ImageFilter
 
 # Setup Logging
 logging.basicConfig(
@@ -19,28 +31,66 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Configuration
-ROOT_FOLDER = "BoothDownloaderOut"
+ROOT_FOLDERS = ["BoothDownloaderOut"] # Earlier roots win when the same item id exists in several
 OUTPUT_FILE = "asset_library.html"
 CACHE_FILE = "web_data/cache/translation_cache.json"
 DESC_CACHE_FILE = "web_data/cache/descriptions_cache.json"
+TRANSLATION_LEDGER_FILE = "web_data/cache/translation_failures.json"
 THUMB_META_FILE = "web_data/cache/thumbnail_meta.json"
+SIMILARITY_CACHE_FILE = "web_data/cache/similarity_cache.json"
+CONTENT_INDEX_FILE = "web_data/cache/content_index.json"
+ADULT_CACHE_FILE = "web_data/cache/adult_filter_cache.json"
+IMAGE_INDEX_FILE = "web_data/cache/image_index.json"
+RETIRED_FILE = "web_data/cache/retired_versions.json"
+GALLERY_ARTIFACTS_FILE = "web_data/cache/gallery_artifacts.json"
 FILTER_FILE = "web_data/filters.json"
 L18N_FILE = "web_data/l18n.json"
 ALIAS_FILE = "web_data/alias.json"
+GLOSSARY_FILE = "web_data/glossary.json"
+USER_GLOSSARY_FILE = "web_data/glossary_user.json" # Optional, entries override the shipped glossary
+GLOSSARY_STATS_FILE = "web_data/cache/glossary_stats.json"
+ARTIFACT_DIR = "web_data/cache/artifacts" # Content-addressed translations and encoded images, portable between machines
+ARTIFACT_REMOTE = "" # Optional shared directory (NAS, synced folder) artifacts are also read from and written to
 SKIP_TRANSLATION = False
 MAX_TRANSLATION_WORKERS = 5
+TRANSLATION_ERROR_MARKER = "Error 504"
+TRANSLATION_RETRY_BASE = 600 # Seconds until the first retry of a failed term/segment, doubled per attempt
+TRANSLATION_RETRY_MAX = 7 * 24 * 3600
+DESC_SEGMENT_CHARS = 4500 # Descriptions are translated in line-aligned segments of at most this size
 MAX_OPTIMIZATION_WORKERS = 16
+MAX_ROOT_IO_WORKERS = 8 # I/O threads per root, roots are scanned concurrently
 
 # Database Cache Settings
 DATABASE_JS_FILE = "web_data/cache/database.js"
 GLOBAL_META_FILE = "web_data/cache/global_metadata.json"
+MANIFEST_JS_FILE = "web_data/cache/manifest.js"
+DELTA_DIR = "web_data/cache/deltas"
+FILE_LIST_DIR = "web_data/cache/files"
+FILE_LIST_SHARD_ITEMS = 64 # Binary listings are split into scripts of about this many items, the page loads one when a Files tab opens
+DELTA_HISTORY = 20 # Builds a browser can lag behind before it falls back to the full snapshot
 
 # Thumbnail Optimization
 OPTIMIZE_THUMBNAILS = True
 OPTIMIZE_GALLERY = False 
 THUMBNAIL_SIZE = (256, 256)
+LQIP_SIZE = 8 # Placeholder grid (LQIP_SIZE x LQIP_SIZE, RGB444) embedded in the database
 IMG_OUT_DIR = "web_data/img"
 GALLERY_OUT_DIR = "web_data/img/gallery"
+BLUR_LAYERS = True # Tiny pre-blurred copies of every preview image for the carousel background
+BLUR_SIZE = 48
+BLUR_RADIUS = 3 # Gaussian radius at BLUR_SIZE, about a 40px blur once stretched over the carousel
+BLUR_OUT_DIR = "web_data/img/blur"
+
+# Similar Items (MinHash + LSH over names, tags and variations)
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_MAX_BUCKET = 200 # Buckets larger than this are too generic to be useful and are skipped
+SIMILAR_TOP_K = 8
+SIMILAR_MIN_SCORE = 0.25
+
+# Duplicate Binary Files
+CONTENT_INDEX_MIN_BYTES = 1024 # Smaller files are left out of duplicate detection
+CONTENT_PARTIAL_BYTES = 65536 # Head and tail bytes hashed first when sizes collide
 
 # Shared Body Groups (Case-insensitive)
 BODY_GROUPS = ["MameFriends", "MaruBody", "+Head", "Plushead", "Bodyset2"]
@@ -55,16 +105,212 @@ FORBIDDEN_NAMES = {
     "fullset", "edition", "sf", "3dcg", "vrm", "mmd", "body", "set"
 }
 
+# Generic Japanese words stripped from original avatar names before n-gram matching
+JP_NAME_STOPWORDS = [
+    "オリジナル", "アバター", "モデル", "キャラクター", "対応", "衣装", "想定", "専用", "向け", "ちゃん", "くん",
+    "セット", "素体", "改変", "販売", "新規", "男性", "女性", "男の子", "女の子", "ボディ", "用", "可", "版"
+]
+
 # Purely cosmetic: these strings will be stripped from the English UI display
 STRINGS_TO_REMOVE = ["Original 3D Model", "Avatar", "3D Model", "[]", "[Release sale]", "Original 3D : ", "Original 3D", "[PhysBones compatible]", "(PB compatible)", "[PB compatible]", " /"]
 
+cli = argparse.ArgumentParser(description="Generates asset_library.html from BoothDownloader output.")
+cli.add_argument("--import-artifacts", metavar="PACK", help="seed the artifact store from a pack file before building")
+cli.add_argument("--export-artifacts", metavar="PACK", help="write the artifact store to a pack file after building")
+cli.add_argument("--artifact-remote", metavar="DIR", default=ARTIFACT_REMOTE, help="shared directory used as a second artifact store")
+cli_args = cli.parse_args() if __name__ == "__main__" else cli.parse_args([]) # Importing the module must not read the host's argv
+
 logger.info(f"--- Starting Library Generation ---")
 
 # Ensure directories exist
 if not os.path.exists("web_data"): os.makedirs("web_data")
 if not os.path.exists("web_data/cache"): os.makedirs("web_data/cache")
+if not os.path.exists(DELTA_DIR): os.makedirs(DELTA_DIR)
+if not os.path.exists(FILE_LIST_DIR): os.makedirs(FILE_LIST_DIR)
+if not os.path.exists(ARTIFACT_DIR): os.makedirs(ARTIFACT_DIR)
 if OPTIMIZE_THUMBNAILS and not os.path.exists(IMG_OUT_DIR): os.makedirs(IMG_OUT_DIR)
 if OPTIMIZE_GALLERY and not os.path.exists(GALLERY_OUT_DIR): os.makedirs(GALLERY_OUT_DIR)
+if BLUR_LAYERS and not os.path.exists(BLUR_OUT_DIR): os.makedirs(BLUR_OUT_DIR)
+
+# Every generated file goes through a temp file + rename and is skipped when its content is unchanged
+class HashingWriter:
+    """Text sink that writes UTF-8 to a binary file and hashes the same bytes, so callbacks are serialized only once."""
+    def __init__(self, f): self.f, self.sha = f, hashlib.sha1()
+    def write(self, s):
+        data = s.encode('utf-8') if isinstance(s, str) else s
+        self.sha.update(data); self.f.write(data)
+
+def content_digest(content): return hashlib.sha1(content.encode('utf-8') if isinstance(content, str) else content).hexdigest()
+
+def file_digest(path):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''): sha.update(chunk)
+    return sha.hexdigest()
+
+def write_temp(path, content):
+    """Writes str, bytes or a callback emitting text to a temp file next to path in one pass. Returns the temp path and its digest."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            sink = HashingWriter(f)
+            content(sink) if callable(content) else sink.write(content)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    return tmp, sink.sha.hexdigest()
+
+def write_atomic(path, content, digest=None):
+    """Writes str, bytes or a callback emitting text to path. Returns False when the file already held this content.
+    In-memory content is compared before writing, callbacks are streamed to a temp file that is dropped when unchanged."""
+    if not callable(content):
+        digest = digest or content_digest(content)
+        if os.path.exists(path) and file_digest(path) == digest: return False
+    tmp, digest = write_temp(path, content)
+    if os.path.exists(path) and file_digest(path) == digest:
+        os.remove(tmp)
+        return False
+    os.replace(tmp, path)
+    return True
+
+def hashed_path(path, digest):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest[:12]}{ext}"
+
+def published_versions(path):
+    stem, ext = os.path.splitext(path)
+    pattern = re.compile(re.escape(os.path.basename(stem)) + r"\.[0-9a-f]{12}" + re.escape(ext) + "$")
+    folder = os.path.dirname(path) or "."
+    return [os.path.join(os.path.dirname(path), f) for f in os.listdir(folder) if pattern.match(f)] if os.path.isdir(folder) else []
+
+published_targets, retired_versions = set(), set()
+
+def publish_hashed(path, content, stale=None):
+    """Publishes content under a content-hashed name next to path, so browsers can cache it as immutable.
+    Superseded versions (stale, or every other hashed sibling plus the unhashed path) are only retired here,
+    pages still holding the previous HTML or manifest keep resolving them until the next build."""
+    if callable(content):
+        tmp, digest = write_temp(path, content)
+        target = hashed_path(path, digest)
+        if os.path.exists(target): os.remove(tmp)
+        else: os.replace(tmp, target)
+    else:
+        digest = content_digest(content)
+        target = hashed_path(path, digest)
+        if not os.path.exists(target): write_atomic(target, content, digest)
+    published_targets.add(target)
+    for old in (published_versions(path) + [path]) if stale is None else stale:
+        if old and old != target and os.path.exists(old): retired_versions.add(old)
+    return target
+
+def remove_retired_versions():
+    """Runs once the HTML and manifest are written: deletes what the previous build retired, remembers this build's retirements."""
+    previous = []
+    if os.path.exists(RETIRED_FILE):
+        try:
+            with open(RETIRED_FILE, 'r', encoding='utf-8') as f: previous = json.load(f)
+        except Exception: pass
+    for old in previous:
+        if old not in published_targets and os.path.exists(old):
+            try: os.remove(old)
+            except OSError: pass
+    write_atomic(RETIRED_FILE, json.dumps(sorted(p for p in retired_versions if p not in published_targets and os.path.exists(p))))
+
+def find_published(path):
+    candidates = [p for p in published_versions(path) + [path] if os.path.exists(p)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+# Artifacts are keyed by a hash of their source plus the settings that produced them, never by item id or path
+ARTIFACT_SETTINGS = {
+    "term": "google auto>en",
+    "desc": "google auto>en",
+    "thumb": f"webp q80 lanczos square {THUMBNAIL_SIZE[0]}x{THUMBNAIL_SIZE[1]}",
+    "gallery": "webp q85",
+}
+ARTIFACT_KEY_RE = re.compile(r"^[0-9a-f]{40}$")
+artifact_remote = cli_args.artifact_remote
+
+def text_digest(text): return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def artifact_key(kind, source_digest): return hashlib.sha1(f"{kind}\n{ARTIFACT_SETTINGS[kind]}\n{source_digest}".encode('utf-8')).hexdigest()
+
+def artifact_path(key, root=ARTIFACT_DIR): return os.path.join(root, key[:2], key)
+
+def artifact_put(key, data, remote=True):
+    for root in (ARTIFACT_DIR, artifact_remote if remote else None):
+        if not root or os.path.exists(artifact_path(key, root)): continue
+        try:
+            os.makedirs(os.path.dirname(artifact_path(key, root)), exist_ok=True)
+            write_atomic(artifact_path(key, root), data)
+        except OSError: logger.debug(f"Could not store artifact {key} in {root}:\n{traceback.format_exc()}")
+
+def artifact_get(key):
+    for root in (ARTIFACT_DIR, artifact_remote):
+        if not root: continue
+        try:
+            with open(artifact_path(key, root), 'rb') as f: data = f.read()
+        except OSError: continue
+        if root != ARTIFACT_DIR: artifact_put(key, data, remote=False)
+        return data
+    return None
+
+def prune_artifacts():
+    """Drops local artifacts the current build no longer references. A remote store is shared and left alone."""
+    keep = {artifact_key("term", text_digest(term)) for term in translation_cache}
+    for item in existing_database.values():
+        for seg in split_segments(item.get('descOrig') or ''):
+            if contains_japanese(seg): keep.add(artifact_key("desc", text_digest(unicodedata.normalize('NFKC', seg))))
+    keep.update(meta["key"] for meta in thumb_meta.values() if isinstance(meta, dict) and meta.get("key"))
+    for name in [n for n in gallery_artifacts if not os.path.exists(os.path.join(GALLERY_OUT_DIR, n))]: del gallery_artifacts[name]
+    keep.update(gallery_artifacts.values())
+    write_atomic(GALLERY_ARTIFACTS_FILE, json.dumps(gallery_artifacts, sort_keys=True))
+    removed = 0
+    for key in [k for k in stored_artifacts() if k not in keep]:
+        try: os.remove(artifact_path(key)); removed += 1
+        except OSError: pass
+    if removed: logger.info(f"[Artifacts] Pruned {removed} artifacts no longer referenced")
+
+def stored_artifacts():
+    for shard in sorted(os.listdir(ARTIFACT_DIR)):
+        if os.path.isdir(os.path.join(ARTIFACT_DIR, shard)):
+            yield from (key for key in sorted(os.listdir(os.path.join(ARTIFACT_DIR, shard))) if ARTIFACT_KEY_RE.match(key))
+
+def link_artifact(key, path):
+    """Gives a stored artifact a second name so it is kept on disk once, copies where hardlinks are unsupported."""
+    try: os.link(artifact_path(key), path); return
+    except FileExistsError: return
+    except OSError: pass
+    with open(artifact_path(key), 'rb') as f: write_atomic(path, f.read())
+
+def export_artifacts(pack_path):
+    tmp, count = f"{pack_path}.{os.getpid()}.tmp", 0
+    try:
+        with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED) as pack:
+            for key in stored_artifacts():
+                pack.write(artifact_path(key), key); count += 1
+            pack.writestr("manifest.json", json.dumps({"format": 1, "settings": ARTIFACT_SETTINGS, "artifacts": count}))
+        os.replace(tmp, pack_path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    logger.info(f"[Artifacts] Exported {count} artifacts to {pack_path} ({get_readable_size(os.path.getsize(pack_path))})")
+
+def import_artifacts(pack_path):
+    imported, total = 0, 0
+    with zipfile.ZipFile(pack_path) as pack:
+        for name in pack.namelist():
+            if not ARTIFACT_KEY_RE.match(name): continue
+            total += 1
+            if os.path.exists(artifact_path(name)): continue
+            os.makedirs(os.path.dirname(artifact_path(name)), exist_ok=True)
+            write_atomic(artifact_path(name), pack.read(name)); imported += 1
+    logger.info(f"[Artifacts] Imported {imported} of {total} artifacts from {pack_path}")
+
+if cli_args.import_artifacts:
+    try: import_artifacts(cli_args.import_artifacts)
+    except Exception: logger.error(f"Could not import artifact pack {cli_args.import_artifacts}:\n{traceback.format_exc()}")
 
 # Force re-translation if caches are missing
 FORCE_TRANSLATION = False
@@ -73,16 +319,18 @@ if not SKIP_TRANSLATION:
         logger.warning("Translation cache files missing. Forcing full re-translation.")
         FORCE_TRANSLATION = True
 
-# Load External Filters
-ADULT_KEYWORDS = []
+# Load External Filters, entries are plain keywords or {"keyword": ..., "wholeWord": bool, "caseSensitive": bool}
+ADULT_FILTERS = {}
 if os.path.exists(FILTER_FILE):
     try:
         with open(FILTER_FILE, 'r', encoding='utf-8') as f:
             ext_data = json.load(f)
-            if isinstance(ext_data, list): ADULT_KEYWORDS.extend(ext_data)
+            for entry in ext_data if isinstance(ext_data, list) else []:
+                if isinstance(entry, str): entry = {"keyword": entry}
+                keyword = str(entry.get("keyword", "")).strip() if isinstance(entry, dict) else ""
+                if keyword: ADULT_FILTERS[keyword] = (bool(entry.get("wholeWord")), bool(entry.get("caseSensitive")))
     except Exception:
         logger.error(f"Error loading {FILTER_FILE}:\n{traceback.format_exc()}")
-ADULT_KEYWORDS = list(set(ADULT_KEYWORDS))
 
 # Load Aliases
 alias_data = {}
@@ -93,30 +341,75 @@ if os.path.exists(ALIAS_FILE):
     except Exception:
         logger.error(f"Could not load alias.json:\n{traceback.format_exc()}")
 
+# Translation keys: NFKC, every bracket style folded to [], whitespace collapsed
+BRACKET_FOLD = str.maketrans("【〔〖〘〚｛{<〈《「『(】〕〗〙〛｝}>〉》」』)", "[[[[[[[[[[[[[]]]]]]]]]]]]]")
+BRACKET_SPACE_RE = re.compile(r'\s*([\[\]])\s*')
+
+def normalize_term(text):
+    return BRACKET_SPACE_RE.sub(r'\1', ' '.join(unicodedata.normalize('NFKC', str(text)).translate(BRACKET_FOLD).split()))
+
+# Offline glossary, answers common Booth terms without a backend request (matched case-insensitively)
+glossary = {}
+for glossary_path in (GLOSSARY_FILE, USER_GLOSSARY_FILE):
+    if not os.path.exists(glossary_path): continue
+    try:
+        with open(glossary_path, 'r', encoding='utf-8') as f:
+            for term, trans in json.load(f).items():
+                if str(trans).strip(): glossary[normalize_term(term).casefold()] = str(trans).strip()
+    except Exception: logger.error(f"Could not load {glossary_path}:\n{traceback.format_exc()}")
+
 # Load Caches
 translation_cache = {}
 if os.path.exists(CACHE_FILE):
     try:
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f: translation_cache = json.load(f)
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            for term, trans in json.load(f).items():
+                key = normalize_term(term) # Caches from older builds are keyed by the raw text
+                if key not in translation_cache or TRANSLATION_ERROR_MARKER in str(translation_cache[key]): translation_cache[key] = trans
     except Exception: pass
 
+def glossary_term(key): return glossary.get(key.casefold())
+
+def cached_translation(text):
+    key = normalize_term(text)
+    return glossary_term(key) or translation_cache.get(key, "")
+
 description_cache = {}
 if os.path.exists(DESC_CACHE_FILE):
     try:
         with open(DESC_CACHE_FILE, 'r', encoding='utf-8') as f: description_cache = json.load(f)
     except Exception: pass
 
-# Clean Error 504 from caches
-error_ids = set()
+# Failed translation units ("term:<text>" / "desc:<id>") with attempt counts and backoff
+translation_ledger = {}
+if os.path.exists(TRANSLATION_LEDGER_FILE):
+    try:
+        with open(TRANSLATION_LEDGER_FILE, 'r', encoding='utf-8') as f:
+            translation_ledger = {(f"term:{normalize_term(k[5:])}" if k.startswith("term:") else k): e for k, e in json.load(f).items()}
+    except Exception: pass
+
+def ledger_due(key):
+    entry = translation_ledger.get(key)
+    return not entry or entry.get("next_retry", 0) <= time.time()
+
+def ledger_fail(key, kind, error, **extra):
+    entry = translation_ledger.setdefault(key, {"kind": kind, "attempts": 0})
+    entry.update(extra)
+    entry["attempts"] += 1
+    entry["error"] = error
+    entry["next_retry"] = time.time() + min(TRANSLATION_RETRY_BASE * 2 ** (entry["attempts"] - 1), TRANSLATION_RETRY_MAX)
+
+# Move Error 504 results out of the caches and into the ledger, due immediately
 def cleanup_translation_errors():
-    global translation_cache, description_cache
-    to_delete_short = [k for k, v in translation_cache.items() if "Error 504" in str(v)]
-    for k in to_delete_short: del translation_cache[k]
+    to_delete_short = [k for k, v in translation_cache.items() if TRANSLATION_ERROR_MARKER in str(v)]
+    for k in to_delete_short:
+        del translation_cache[k]
+        translation_ledger.setdefault(f"term:{k}", {"kind": "term", "attempts": 0, "error": TRANSLATION_ERROR_MARKER, "next_retry": 0})
     
-    to_delete_desc = [k for k, v in description_cache.items() if "Error 504" in str(v)]
+    to_delete_desc = [k for k, v in description_cache.items() if TRANSLATION_ERROR_MARKER in str(v)]
     for k in to_delete_desc: 
         del description_cache[k]
-        error_ids.add(k) 
+        translation_ledger.setdefault(f"desc:{k}", {"kind": "desc", "attempts": 0, "error": TRANSLATION_ERROR_MARKER, "next_retry": 0})
 
 cleanup_translation_errors()
 
@@ -126,23 +419,159 @@ if os.path.exists(THUMB_META_FILE):
         with open(THUMB_META_FILE, 'r', encoding='utf-8') as f: thumb_meta = json.load(f)
     except Exception: pass
 
+# Gallery WebPs by file name and the artifact they were linked from, so pruning keeps their sources
+gallery_artifacts = {}
+if os.path.exists(GALLERY_ARTIFACTS_FILE):
+    try:
+        with open(GALLERY_ARTIFACTS_FILE, 'r', encoding='utf-8') as f: gallery_artifacts = json.load(f)
+    except Exception: pass
+
+similarity_cache = {}
+if os.path.exists(SIMILARITY_CACHE_FILE):
+    try:
+        with open(SIMILARITY_CACHE_FILE, 'r', encoding='utf-8') as f: similarity_cache = json.load(f)
+    except Exception: pass
+
+# Item folder images {folder: {name: [bytes, mtime_ns, format, width, height]}}, reused while bytes and mtime match
+image_index = {}
+if os.path.exists(IMAGE_INDEX_FILE):
+    try:
+        with open(IMAGE_INDEX_FILE, 'r', encoding='utf-8') as f: image_index = json.load(f)
+    except Exception: pass
+folder_images = {} # get_image_index results of this build, so every stage reads the same single listing per folder
+
+# Per-item adult verdicts [content version, keyword], only valid for the filter list they were made with
+adult_cache = {}
+if os.path.exists(ADULT_CACHE_FILE):
+    try:
+        with open(ADULT_CACHE_FILE, 'r', encoding='utf-8') as f: adult_cache = json.load(f)
+    except Exception: pass
+
+# Partial/full content hashes of Binary files, valid while the [size, mtime_ns] signature matches
+content_index = {}
+if os.path.exists(CONTENT_INDEX_FILE):
+    try:
+        with open(CONTENT_INDEX_FILE, 'r', encoding='utf-8') as f: content_index = json.load(f)
+    except Exception: pass
+
 global_meta = {}
 if os.path.exists(GLOBAL_META_FILE):
     try:
         with open(GLOBAL_META_FILE, 'r', encoding='utf-8') as f: global_meta = json.load(f)
     except Exception: pass
 
-existing_database = {}
-if os.path.exists(DATABASE_JS_FILE):
+class FrozenDict(dict):
+    """Read-only dict used for decoded detail fields, which are copies: edits would be silently lost."""
+    def _readonly(self, *args, **kwargs): raise TypeError("detail fields are decoded copies, edit item.thaw(key) and assign it back")
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _readonly
+
+def freeze(value):
+    if isinstance(value, dict): return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list): return tuple(freeze(v) for v in value)
+    return value
+
+class ItemRecord:
+    """Slotted, dict-compatible item. Bulky detail fields are zlib-compressed one by one and only decoded when that field is read.
+    Reading a detail field returns a read-only copy, changes go through item.thaw(key) and item[key] = value."""
+    FIELDS = ("id", "nameOrig", "nameTrans", "authorOrig", "authorTrans", "gridThumb", "lqip", "allImages", "imageSizes", "blurs", "bytes", "imgBytes",
+              "fileCount", "fileShard", "files", "tags", "adult", "adultSource", "adultKeyword", "searchBlob", "folder", "boothUrl", "wishCount", "timestamp", "priceValue",
+              "priceCurrency", "limited", "descOrig", "descTrans", "vrcAvatarLink", "vrcWorldLink", "isAvatar", "links", "similar")
+    DETAIL_FIELDS = ("files", "descOrig", "descTrans")
+    OFF_PAGE_FIELDS = ("files",) # Written to the sharded file listings instead of database.js
+    INTERNED_FIELDS = ("id", "authorOrig", "authorTrans", "priceCurrency", "adultKeyword")
+    INTERNED_LISTS = ("tags", "links", "similar", "blurs")
+    DETAIL_SLOTS = {k: f"_{k}" for k in DETAIL_FIELDS}
+    PLAIN_FIELDS = frozenset(FIELDS) - frozenset(DETAIL_FIELDS)
+    __slots__ = tuple(sorted(PLAIN_FIELDS)) + tuple(DETAIL_SLOTS.values()) + ("_extra",)
+
+    def __init__(self, data):
+        self._extra = None
+        for k, v in data.items(): self[k] = v
+
+    def __getitem__(self, key):
+        if key in self.DETAIL_SLOTS: return freeze(self.thaw(key))
+        if key in self.PLAIN_FIELDS:
+            try: return getattr(self, key)
+            except AttributeError: raise KeyError(key)
+        if self._extra and key in self._extra: return self._extra[key]
+        raise KeyError(key)
+
+    def thaw(self, key):
+        """Mutable copy of a detail field, to be assigned back with item[key] = value."""
+        try: return json.loads(zlib.decompress(getattr(self, self.DETAIL_SLOTS[key])))
+        except AttributeError: raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.DETAIL_SLOTS:
+            setattr(self, self.DETAIL_SLOTS[key], zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8')))
+        elif key in self.PLAIN_FIELDS:
+            if key in self.INTERNED_FIELDS and isinstance(value, str): value = sys.intern(value)
+            elif key in self.INTERNED_LISTS and isinstance(value, list): value = [sys.intern(v) if isinstance(v, str) else v for v in value]
+            setattr(self, key, value)
+        else: 
+            if self._extra is None: self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        if key in self.DETAIL_SLOTS: return hasattr(self, self.DETAIL_SLOTS[key])
+        if key in self.PLAIN_FIELDS: return hasattr(self, key)
+        return bool(self._extra) and key in self._extra
+
+    def get(self, key, default=None):
+        try: return self[key]
+        except KeyError: return default
+
+    def to_dict(self):
+        out = {}
+        for k in self.FIELDS:
+            if k in self.OFF_PAGE_FIELDS: continue
+            if k in self.DETAIL_SLOTS:
+                if k in self: out[k] = self[k]
+            elif hasattr(self, k): out[k] = getattr(self, k)
+        if self._extra: out.update(self._extra)
+        return out
+
+def item_digest(item): return hashlib.sha1(json.dumps(item, ensure_ascii=False, sort_keys=True, default=ItemRecord.to_dict).encode('utf-8')).hexdigest()
+
+def iter_json_array(text):
+    """Yields the elements of a top-level JSON array one at a time, so the full list of dicts never exists at once."""
+    decoder, ws = json.JSONDecoder(), re.compile(r'[\s,]*')
+    pos = ws.match(text, text.index('[') + 1).end()
+    while pos < len(text) and text[pos] != ']':
+        value, pos = decoder.raw_decode(text, pos)
+        yield value
+        pos = ws.match(text, pos).end()
+
+db_manifest = {}
+if os.path.exists(MANIFEST_JS_FILE):
+    try:
+        with open(MANIFEST_JS_FILE, 'r', encoding='utf-8') as f:
+            db_manifest = json.loads(f.read().replace("window.BOOTH_MANIFEST = ", "").rstrip(";"))
+    except Exception: pass
+
+# Older versions stay on disk for one build, so the manifest decides which snapshot and shards are current
+existing_database, previous_digests = {}, None
+database_snapshot = db_manifest.get("snapshot") if os.path.exists(db_manifest.get("snapshot") or "") else find_published(DATABASE_JS_FILE)
+if database_snapshot:
+    try:
+        with open(database_snapshot, 'r', encoding='utf-8') as f: content = f.read()
+        previous_digests = {}
+        for item in iter_json_array(content):
+            previous_digests[item['id']] = item_digest(item)
+            for orig_key, trans_key in (('nameOrig', 'nameTrans'), ('authorOrig', 'authorTrans')):
+                if TRANSLATION_ERROR_MARKER in str(item.get(trans_key, '')):
+                    item[trans_key] = ""
+                    translation_ledger.setdefault(f"term:{normalize_term(item[orig_key])}", {"kind": "term", "attempts": 0, "error": TRANSLATION_ERROR_MARKER, "next_retry": 0, "source": item[orig_key].strip()})
+            existing_database[item['id']] = ItemRecord(item)
+        del content # Release the raw payload, only the compact records are kept
+    except Exception: existing_database, previous_digests = {}, None
+
+FILE_LIST_PREFIX = "Object.assign(window.BOOTH_FILES = window.BOOTH_FILES || {}, "
+for shard_path in filter(None, db_manifest.get("fileLists") or glob.glob(os.path.join(FILE_LIST_DIR, "files_*.js"))):
     try:
-        with open(DATABASE_JS_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-            json_str = content.replace("window.BOOTH_DATABASE = ", "").rstrip(";")
-            db_list = json.loads(json_str)
-            existing_database = {item['id']: item for item in db_list}
-            for item in db_list:
-                if "Error 504" in str(item.get('nameTrans', '')) or "Error 504" in str(item.get('authorTrans', '')):
-                    error_ids.add(item['id'])
+        with open(shard_path, 'r', encoding='utf-8') as f: shard = json.loads(f.read()[len(FILE_LIST_PREFIX):-2])
+        for item_id, tree in shard.items():
+            if item_id in existing_database: existing_database[item_id]['files'] = tree
     except Exception: pass
 
 l18n_data = {"languages": {"en": "English"}, "translations": {"en": {}}}
@@ -153,10 +582,25 @@ if os.path.exists(L18N_FILE):
 
 def contains_japanese(text): return bool(re.search(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]', str(text)))
 
-def translate_single_text(text):
-    if not text or not contains_japanese(text) or SKIP_TRANSLATION: return text
-    try: return GoogleTranslator(source='auto', target='en').translate(text)
-    except Exception: return text
+def translate_unit(text):
+    result = GoogleTranslator(source='auto', target='en').translate(text)
+    if not result or TRANSLATION_ERROR_MARKER in str(result): raise RuntimeError(f"{TRANSLATION_ERROR_MARKER}: {result}")
+    return result
+
+def classify_error(e): return TRANSLATION_ERROR_MARKER if TRANSLATION_ERROR_MARKER in str(e) else type(e).__name__
+
+def split_segments(text):
+    segments, lines, size = [], [], 0
+    for line in text.split('\n'):
+        pieces = [line[i:i + DESC_SEGMENT_CHARS] for i in range(0, len(line), DESC_SEGMENT_CHARS)] or [""]
+        for piece in pieces:
+            if lines and size + len(piece) + 1 > DESC_SEGMENT_CHARS: segments.append('\n'.join(lines)); lines, size = [], 0
+            lines.append(piece); size += len(piece) + 1
+    if lines: segments.append('\n'.join(lines))
+    return segments
+
+def make_search_blob(asset_id, asset_name, name_trans, author_name, author_trans, tags):
+    return f"{asset_id} {asset_name} {name_trans} {author_name} {author_trans} {' '.join(tags)}".lower()
 
 def print_progress(current, total, label="Progress"):
     percent = (current / total) * 100
@@ -181,35 +625,79 @@ def calculate_crc32(filepath):
     except Exception:
         return None
 
+def to_web_path(path):
+    if os.path.isabs(path):
+        try: path = os.path.relpath(path, start=os.getcwd())
+        except ValueError: return Path(path).as_uri() # Root on another drive
+    return quote(path.replace('\\', '/'))
+
+def from_web_path(web_path):
+    if web_path.startswith('file:'): return url2pathname(urlparse(web_path).path)
+    return unquote(web_path).replace('/', os.sep)
+
+def encode_lqip(img):
+    small = img.convert('RGB').resize((LQIP_SIZE, LQIP_SIZE), Image.Resampling.BOX)
+    nibbles = [c >> 4 for c in small.tobytes()]
+    packed = bytes((nibbles[i] << 4) | nibbles[i + 1] for i in range(0, len(nibbles), 2))
+    return base64.b64encode(packed).decode('ascii')
+
+def get_thumb_meta(asset_id):
+    meta = thumb_meta.get(asset_id)
+    if isinstance(meta, str): return {"crc": meta}
+    return meta or {}
+
 def get_optimized_thumb(asset_id, original_path, crc):
     if not original_path or not os.path.exists(original_path): return ""
-    thumb_name = f"{asset_id}_thumb.webp"
-    thumb_path = os.path.join(IMG_OUT_DIR, thumb_name)
+    thumb_path = os.path.join(IMG_OUT_DIR, f"{asset_id}_thumb.webp")
     try:
-        with Image.open(original_path) as img:
-            width, height = img.size
-            if width != height:
-                min_dim = min(width, height)
-                img = img.crop(((width-min_dim)/2, (height-min_dim)/2, (width+min_dim)/2, (height+min_dim)/2))
-            img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-            img.save(thumb_path, "WEBP", optimize=True, quality=80)
-            return quote(thumb_path.replace('\\', '/')), crc
+        key = artifact_key("thumb", file_digest(original_path))
+        data = artifact_get(key)
+        if not data:
+            with Image.open(original_path) as img:
+                width, height = img.size
+                if width != height:
+                    min_dim = min(width, height)
+                    img = img.crop(((width-min_dim)/2, (height-min_dim)/2, (width+min_dim)/2, (height+min_dim)/2))
+                img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+                buf = io.BytesIO()
+                img.save(buf, "WEBP", optimize=True, quality=80)
+                data = buf.getvalue()
+            artifact_put(key, data)
+        with Image.open(io.BytesIO(data)) as img: lqip = encode_lqip(img) # Decoded from the stored bytes so every machine derives the same placeholder
+        published = publish_hashed(thumb_path, data, stale=[get_thumb_meta(asset_id).get('file'), thumb_path])
+        return quote(published.replace('\\', '/')), crc, lqip, key
     except Exception:
         logger.error(f"Failed to optimize thumb {original_path}:\n{traceback.format_exc()}")
-        return quote(original_path.replace('\\', '/')), None
+        return to_web_path(original_path), None, "", None
+
+def get_blur_layer(original_path, crc):
+    with Image.open(original_path) as img:
+        img.thumbnail((BLUR_SIZE, BLUR_SIZE), Image.Resampling.BOX) # Lets JPEGs decode at reduced scale
+        small = img.convert('RGB').filter(ImageFilter.GaussianBlur(BLUR_RADIUS))
+    buf = io.BytesIO()
+    small.save(buf, "WEBP", quality=60)
+    write_atomic(os.path.join(BLUR_OUT_DIR, f"{crc}.webp"), buf.getvalue())
 
 def get_optimized_gallery_img(asset_id, original_path, crc):
     if not original_path or not os.path.exists(original_path): return ""
     file_name = os.path.basename(original_path)
     opt_name = f"{asset_id}_{crc}_{os.path.splitext(file_name)[0]}.webp"
     opt_path = os.path.join(GALLERY_OUT_DIR, opt_name)
-    if os.path.exists(opt_path): return quote(opt_path.replace('\\', '/'))
+    if os.path.exists(opt_path): return quote(opt_path.replace('\\', '/')), None
     try:
-        with Image.open(original_path) as img:
-            img.save(opt_path, "WEBP", optimize=True, quality=85)
-            return quote(opt_path.replace('\\', '/'))
+        key = artifact_key("gallery", file_digest(original_path))
+        data = None if os.path.exists(artifact_path(key)) else artifact_get(key) # A remote hit lands in the local store
+        if not data and not os.path.exists(artifact_path(key)):
+            with Image.open(original_path) as img:
+                buf = io.BytesIO()
+                img.save(buf, "WEBP", optimize=True, quality=85)
+                data = buf.getvalue()
+            artifact_put(key, data)
+        if os.path.exists(artifact_path(key)): link_artifact(key, opt_path)
+        else: write_atomic(opt_path, data)
+        return quote(opt_path.replace('\\', '/')), key
     except Exception:
-        return quote(original_path.replace('\\', '/'))
+        return to_web_path(original_path), None
 
 HTML_TEMPLATE = r"""<!doctype html>
 <html lang="en">
@@ -311,6 +799,10 @@ HTML_TEMPLATE = r"""<!doctype html>
                             <span class="modal-section-title" id="relTitle">Relationships</span>
                             <div id="relationshipContainer" class="asset-link-grid"></div>
                         </div>
+                        <div id="simSection" style="display:none; margin-top:20px;">
+                            <span class="modal-section-title" data-i18n="labelSimilar">Similar Items</span>
+                            <div id="similarContainer" class="asset-link-grid"></div>
+                        </div>
                     </div>
                     <div id="pane-files" class="tab-pane">
                         <span class="modal-section-title">Package Contents</span>
@@ -335,18 +827,40 @@ HTML_TEMPLATE = r"""<!doctype html>
     <div id="fullscreenImageViewer" class="fullscreen-viewer" onclick="closeFullscreenImage()">
         <img id="fullscreenImage" src="" alt="Full size preview">
     </div>
-    <script src="__DATABASE_FILE_INJECT_POINT__"></script>
     <script>
         const l18n = __L18N_INJECT_POINT__;
         const translations = l18n.translations;
         const STRINGS_TO_REMOVE = __REMOVABLES_INJECT_POINT__;
-        const database = window.BOOTH_DATABASE || [];
+        const DATABASE_FILE = "__DATABASE_FILE_INJECT_POINT__", MANIFEST_FILE = "__MANIFEST_FILE_INJECT_POINT__";
+        const FILE_LISTS = __FILE_LISTS_INJECT_POINT__, FILE_PAGE_SIZE = 200;
+        const BLUR_DIR = "__BLUR_DIR_INJECT_POINT__";
+        const CAROUSEL_NEIGHBOURS = 1, CAROUSEL_AHEAD = 2, CAROUSEL_KEEP = 2; // Slides loaded around the current one, prefetched in the navigation direction, kept before unloading
+        let fileListItem = null, fileNodes = [];
+        const fileShardLoads = {};
+        let database = [], databaseById = new Map();
         let currentCarouselIndex = 0, currentImages = [];
         let searchTimeout = null;
-        let bgLoadIndex = 0;
+        let queryWorker = null, querySeq = 0, visibleIds = null, onFirstResult = null;
+        const PREFETCH_CONCURRENCY = 6, PREFETCH_SCREENS_AHEAD = 2, FAST_SCROLL_SPEED = 3; // px per ms
+        const PRIORITY_VISIBLE = 0, PRIORITY_AHEAD = 1, PRIORITY_HOVER = 2;
+        let prefetchQueue = [], prefetchPausedUntil = 0, prefetchTimer = null, displayedCards = [], lastScroll = { y: 0, t: 0 }, hoverTimer = null;
+        const prefetchRunning = new Map(), prefetched = new Set();
         const baseTitle = "Booth Asset Library";
         const getLS = (k, def) => localStorage.getItem(k) || def;
         const state = { gridSize: getLS('gridSize', '220'), disableBlur: getLS('disableBlur', 'false') === 'true', sortOrder: getLS('sortOrder', 'id'), sortInvert: getLS('sortInvert', 'false') === 'true', adultFilter: getLS('adultFilter', 'all'), typeFilter: getLS('typeFilter', 'all'), hideIds: getLS('hideIds', 'false') === 'true', lang: getLS('lang', 'en'), showTrans: getLS('showTrans', 'true') === 'true' };
+        const lqipCanvas = document.createElement('canvas');
+        function decodeLqip(code) {
+            const bin = atob(code), side = Math.round(Math.sqrt(bin.length * 2 / 3));
+            lqipCanvas.width = lqipCanvas.height = side;
+            const ctx = lqipCanvas.getContext('2d'), pixels = ctx.createImageData(side, side);
+            for (let i = 0; i < side * side * 3; i++) {
+                const byte = bin.charCodeAt(i >> 1);
+                pixels.data[Math.floor(i / 3) * 4 + i % 3] = ((i & 1) ? byte & 15 : byte >> 4) * 17;
+            }
+            for (let a = 3; a < pixels.data.length; a += 4) pixels.data[a] = 255;
+            ctx.putImageData(pixels, 0, 0);
+            return lqipCanvas.toDataURL();
+        }
         const observerOptions = { root: null, rootMargin: '1000px', threshold: 0.01 };
         const observer = new IntersectionObserver((entries) => {
             entries.forEach(entry => {
@@ -354,16 +868,253 @@ HTML_TEMPLATE = r"""<!doctype html>
                 if (entry.isIntersecting) {
                     const img = el.querySelector('.image-thumbnail');
                     const glow = el.querySelector('.image-backglow');
-                    if (img && !img.src) img.src = el.dataset.img;
-                    if (glow && !glow.src) glow.src = el.dataset.img;
+                    if (el.dataset.lqip && !el.classList.contains('has-lqip')) {
+                        const placeholder = decodeLqip(el.dataset.lqip);
+                        el.querySelector('.image-container').style.backgroundImage = `url(${placeholder})`;
+                        if (glow) glow.src = placeholder;
+                        el.classList.add('has-lqip');
+                    }
+                    if (img && !img.src) prefetch(el.dataset.img, PRIORITY_VISIBLE, () => {
+                        if (!img.src) img.src = el.dataset.img;
+                        if (glow && !glow.src) glow.src = el.dataset.img;
+                    });
                     el.classList.add('is-visible');
                 } else {
+                    prefetchQueue = prefetchQueue.filter(task => task.src !== el.dataset.img || task.priority !== PRIORITY_VISIBLE);
                     el.classList.remove('is-visible');
                 }
             });
         }, observerOptions);
+        // Image prefetch: one priority queue (visible cards, then the next screens in display order, then hovered
+        // carousels) drained by a fixed number of loaders. Paused while scrolling fast, reset by every new query.
+        function prefetch(src, priority, onReady) {
+            if (!src) return;
+            if (prefetched.has(src)) { if (onReady) onReady(); return; }
+            const task = prefetchRunning.get(src) || prefetchQueue.find(t => t.src === src);
+            if (task) {
+                task.priority = Math.min(task.priority, priority);
+                if (onReady) task.callbacks.push(onReady);
+            } else prefetchQueue.push({ src, priority, callbacks: onReady ? [onReady] : [] });
+            if (priority === PRIORITY_VISIBLE && prefetchRunning.size >= PREFETCH_CONCURRENCY) {
+                // A card on screen must not wait behind speculative loads, hand it a slot
+                const victim = Array.from(prefetchRunning.values()).find(t => t.priority !== PRIORITY_VISIBLE && !t.callbacks.length);
+                if (victim) { prefetchRunning.delete(victim.src); victim.img.src = ""; prefetchQueue.push({ src: victim.src, priority: victim.priority, callbacks: [] }); }
+            }
+            pumpPrefetch();
+        }
+        function pumpPrefetch() {
+            const wait = prefetchPausedUntil - performance.now();
+            if (wait > 0) { clearTimeout(prefetchTimer); prefetchTimer = setTimeout(pumpPrefetch, wait); return; }
+            while (prefetchRunning.size < PREFETCH_CONCURRENCY && prefetchQueue.length) {
+                let next = 0;
+                for (let i = 1; i < prefetchQueue.length; i++) if (prefetchQueue[i].priority < prefetchQueue[next].priority) next = i;
+                const task = prefetchQueue.splice(next, 1)[0];
+                task.img = new Image();
+                task.img.onload = task.img.onerror = () => {
+                    if (prefetchRunning.get(task.src) !== task) return;
+                    prefetchRunning.delete(task.src); prefetched.add(task.src);
+                    task.callbacks.forEach(cb => cb());
+                    pumpPrefetch();
+                };
+                prefetchRunning.set(task.src, task);
+                task.img.src = task.src;
+            }
+        }
+        function resetPrefetch() {
+            prefetchQueue = prefetchQueue.filter(task => task.priority === PRIORITY_VISIBLE || task.callbacks.length);
+            prefetchRunning.forEach(task => {
+                if (task.priority === PRIORITY_VISIBLE || task.callbacks.length) return;
+                prefetchRunning.delete(task.src); task.img.src = "";
+            });
+            const list = document.getElementById('assetList');
+            displayedCards = Array.from(list.children).filter(el => el.style.display !== "none");
+            requestAnimationFrame(() => { prefetchAhead(); pumpPrefetch(); });
+        }
+        function prefetchAhead() {
+            // The observer already covers 1000px around the viewport, queue the screens after that in display order
+            const from = window.scrollY + window.innerHeight + 1000, to = from + window.innerHeight * PREFETCH_SCREENS_AHEAD;
+            let lo = 0, hi = displayedCards.length;
+            while (lo < hi) { const mid = (lo + hi) >> 1; if (displayedCards[mid].offsetTop < from) lo = mid + 1; else hi = mid; }
+            for (let i = lo; i < displayedCards.length && displayedCards[i].offsetTop <= to; i++) prefetch(displayedCards[i].dataset.img, PRIORITY_AHEAD);
+        }
+        function onScrollPrefetch() {
+            const now = performance.now(), speed = Math.abs(window.scrollY - lastScroll.y) / Math.max(1, now - lastScroll.t);
+            lastScroll = { y: window.scrollY, t: now };
+            if (speed > FAST_SCROLL_SPEED) prefetchPausedUntil = now + 200;
+            clearTimeout(prefetchTimer);
+            prefetchTimer = setTimeout(() => { prefetchAhead(); pumpPrefetch(); }, 150);
+        }
+        function onHoverPrefetch(e) {
+            const card = e.target.closest('.asset');
+            if (!card || card.contains(e.relatedTarget)) return;
+            clearTimeout(hoverTimer);
+            hoverTimer = setTimeout(() => {
+                const item = databaseById.get(card.dataset.id);
+                if (item) item.allImages.slice(0, 3).forEach(src => prefetch(src, PRIORITY_HOVER));
+            }, 120);
+        }
+        function loadScript(src) {
+            return new Promise((resolve, reject) => {
+                const s = document.createElement('script');
+                s.src = src; s.onload = resolve; s.onerror = reject;
+                document.head.appendChild(s);
+            });
+        }
+        function idbRequest(req) { return new Promise((resolve, reject) => { req.onsuccess = () => resolve(req.result); req.onerror = () => reject(req.error); }); }
+        function idbDone(tx) { return new Promise((resolve, reject) => { tx.oncomplete = resolve; tx.onerror = tx.onabort = () => reject(tx.error); }); }
+        function idbOpen() {
+            const req = indexedDB.open('boothLibrary', 1);
+            req.onupgradeneeded = () => { req.result.createObjectStore('items', { keyPath: 'id' }); req.result.createObjectStore('meta'); };
+            return idbRequest(req);
+        }
+        async function loadDatabase() {
+            const manifest = await loadScript(MANIFEST_FILE + '?t=' + Date.now()).then(() => window.BOOTH_MANIFEST, () => null);
+            let idb = null;
+            if (manifest && window.indexedDB) {
+                try {
+                    idb = await idbOpen();
+                    const stored = await idbRequest(idb.transaction('meta').objectStore('meta').get('version'));
+                    const chain = stored && stored.lineage === manifest.lineage ? manifest.deltas.filter(d => d.version > stored.version) : null;
+                    if (chain && chain.length === manifest.version - stored.version) {
+                        for (const d of chain) await loadScript(d.file);
+                        const tx = idb.transaction(['items', 'meta'], 'readwrite'), items = tx.objectStore('items');
+                        chain.forEach(d => {
+                            const delta = window.BOOTH_DELTAS[d.version];
+                            delta.removed.forEach(id => items.delete(id));
+                            Object.values(delta.added).concat(Object.values(delta.changed)).forEach(item => items.put(item));
+                        });
+                        tx.objectStore('meta').put({ lineage: manifest.lineage, version: manifest.version }, 'version');
+                        await idbDone(tx);
+                        return await idbRequest(idb.transaction('items').objectStore('items').getAll());
+                    }
+                } catch (e) { console.warn('Cached database unavailable, loading full snapshot.', e); }
+            }
+            await loadScript((manifest && manifest.snapshot) || DATABASE_FILE);
+            const snapshot = window.BOOTH_DATABASE || [];
+            if (idb) {
+                const tx = idb.transaction(['items', 'meta'], 'readwrite'), items = tx.objectStore('items');
+                items.clear(); snapshot.forEach(item => items.put(item));
+                tx.objectStore('meta').put({ lineage: manifest.lineage, version: manifest.version }, 'version');
+                idbDone(tx).catch(e => console.warn('Could not cache database.', e));
+            }
+            return snapshot;
+        }
+        // Shared by the grid query (worker) and the details view
+        function matchesAdultFilter(mode, item) { return mode === 'all' || (mode === 'hide' && !item.adult) || (mode === 'only' && item.adult); }
+        function libraryWorker(scope) {
+            let items = [], sorted = [], sortKey = null, pending = null;
+            function computeStats() {
+                let totalBinaryBytes = 0, totalImageBytes = 0;
+                const tagCounts = {}, spent = {};
+                items.forEach(item => {
+                    totalBinaryBytes += item.bytes;
+                    totalImageBytes += item.imgBytes;
+                    item.tags.forEach(t => tagCounts[t] = (tagCounts[t] || 0) + 1);
+                    if (item.priceValue > 0 && item.priceCurrency) spent[item.priceCurrency] = (spent[item.priceCurrency] || 0) + item.priceValue;
+                });
+                return { count: items.length, totalBinaryBytes, totalImageBytes, spent, topTags: Object.entries(tagCounts).sort((a,b) => b[1] - a[1]).slice(0, 10).map(([tag]) => tag) };
+            }
+            function sortItems(order, invert, showTrans) {
+                const key = [order, invert, order === 'name' && showTrans].join('|');
+                if (key === sortKey) return false;
+                sortKey = key;
+                sorted = [...items].sort((a, b) => {
+                    let res = 0;
+                    if (order === 'id') res = isNaN(a.id) || isNaN(b.id) ? a.id.localeCompare(b.id) : parseInt(a.id) - parseInt(b.id);
+                    else if (order === 'new') res = b.timestamp - a.timestamp;
+                    else if (order === 'rel') res = b.wishCount - a.wishCount;
+                    else if (order === 'size') res = b.bytes - a.bytes;
+                    else {
+                        const nA = (showTrans && a.nameTrans) ? a.nameTrans : a.nameOrig;
+                        const nB = (showTrans && b.nameTrans) ? b.nameTrans : b.nameOrig;
+                        res = nA.toLowerCase().localeCompare(nB.toLowerCase());
+                    }
+                    return invert ? res * -1 : res;
+                });
+                return true;
+            }
+            function runQuery(q) {
+                const reordered = sortItems(q.order, q.invert, q.showTrans), query = q.query;
+                const isAuthorSearch = query.startsWith('author:'), isRelSearch = query.startsWith('rel:'), isTypeSearch = query.startsWith('type:');
+                const authorQuery = isAuthorSearch ? query.replace('author:', '').trim() : '';
+                const relQuery = isRelSearch ? query.replace('rel:', '').trim() : '';
+                const typeSearchVal = isTypeSearch ? query.replace('type:', '').trim() : '';
+                const visible = [];
+                let hiddenCount = 0;
+                sorted.forEach(item => {
+                    const adultMatch = matchesAdultFilter(q.adultMode, item);
+                    const typeMatch = (q.typeMode === 'all') || (q.typeMode === 'avatar' && item.isAvatar) || (q.typeMode === 'asset' && !item.isAvatar);
+                    let searchMatch = false;
+                    if (isRelSearch) searchMatch = (item.id === relQuery) || item.links.includes(relQuery);
+                    else if (isAuthorSearch) searchMatch = item.authorOrig.toLowerCase().includes(authorQuery) || item.authorTrans.toLowerCase().includes(authorQuery);
+                    else if (isTypeSearch) searchMatch = (typeSearchVal === 'avatar' ? item.isAvatar : !item.isAvatar);
+                    else searchMatch = item.searchBlob.includes(query);
+                    if (searchMatch && adultMatch && typeMatch) visible.push(item.id);
+                    else if (searchMatch) hiddenCount++;
+                });
+                return { type: 'result', seq: q.seq, visible, hiddenCount, order: reordered ? sorted.map(item => item.id) : null };
+            }
+            scope.onmessage = e => {
+                const msg = e.data;
+                if (msg.type === 'load') {
+                    items = msg.items; sortKey = null;
+                    scope.postMessage({ type: 'stats', stats: computeStats() });
+                } else if (msg.type === 'query') {
+                    // Only the newest query queued while busy is answered; superseded ones are dropped.
+                    const idle = !pending;
+                    pending = msg;
+                    if (idle) setTimeout(() => { const q = pending; pending = null; scope.postMessage(runQuery(q)); }, 0);
+                }
+            };
+        }
+        function startQueryWorker() {
+            const loadMsg = { type: 'load', items: database.map(({ id, searchBlob, adult, isAvatar, links, authorOrig, authorTrans, nameOrig, nameTrans, timestamp, wishCount, bytes, imgBytes, tags, priceValue, priceCurrency }) =>
+                ({ id, searchBlob, adult, isAvatar, links, authorOrig, authorTrans, nameOrig, nameTrans, timestamp, wishCount, bytes, imgBytes, tags, priceValue, priceCurrency })) };
+            const inline = () => {
+                const scope = { postMessage: data => onWorkerMessage({ data }) };
+                libraryWorker(scope);
+                return { postMessage: data => scope.onmessage({ data }) };
+            };
+            try {
+                queryWorker = new Worker(URL.createObjectURL(new Blob([`${matchesAdultFilter.toString()}\n(${libraryWorker.toString()})(self);`], { type: 'text/javascript' })));
+                queryWorker.onmessage = onWorkerMessage;
+                queryWorker.onerror = () => { queryWorker = inline(); queryWorker.postMessage(loadMsg); runQuery(); };
+            } catch (e) { queryWorker = inline(); }
+            queryWorker.postMessage(loadMsg);
+        }
+        function runQuery() {
+            queryWorker.postMessage({
+                type: 'query', seq: ++querySeq, query: document.getElementById("searchInput").value.toLowerCase(),
+                adultMode: document.getElementById("adultFilter").value, typeMode: document.getElementById("typeFilter").value,
+                order: document.getElementById('sortOrder').value, invert: document.getElementById('sortInvert').checked, showTrans: state.showTrans
+            });
+        }
+        function onWorkerMessage(e) {
+            const msg = e.data;
+            if (msg.type === 'stats') renderStats(msg.stats);
+            else if (msg.type === 'result' && msg.seq === querySeq) applyQueryResult(msg);
+        }
+        function applyQueryResult(res) {
+            const list = document.getElementById('assetList'), t = translations[state.lang] || translations['en'];
+            if (res.order) {
+                const frag = document.createDocumentFragment();
+                res.order.forEach(id => frag.appendChild(document.getElementById('asset-' + id)));
+                list.appendChild(frag);
+            }
+            const next = new Set(res.visible);
+            visibleIds.forEach(id => { if (!next.has(id)) document.getElementById('asset-' + id).style.display = "none"; });
+            next.forEach(id => { if (!visibleIds.has(id)) document.getElementById('asset-' + id).style.display = ""; });
+            visibleIds = next;
+            document.getElementById("searchInput").placeholder = t.searchPre + res.visible.length + t.searchSuf;
+            const notice = document.getElementById("filterNotice");
+            if (res.hiddenCount > 0) { notice.innerText = t.hiddenResults.replace('{n}', res.hiddenCount).trim(); notice.style.display = "flex"; } else { notice.style.display = "none"; }
+            resetPrefetch();
+            if (onFirstResult) { onFirstResult(); onFirstResult = null; }
+        }
         function init() {
             renderLibrary();
+            visibleIds = new Set(database.map(item => item.id));
+            startQueryWorker();
             const langSel = document.getElementById('langSelect');
             langSel.innerHTML = "";
             Object.entries(l18n.languages).forEach(([code, name]) => {
@@ -380,52 +1131,26 @@ HTML_TEMPLATE = r"""<!doctype html>
             document.getElementById('hideIdToggle').checked = state.hideIds; 
             document.getElementById('translateToggle').checked = state.showTrans;
             updateLanguage(state.lang); updateGrid(state.gridSize); updateBlur(state.disableBlur); updateIdVisibility(state.hideIds); updateTranslationVisibility(state.showTrans);
-            calculateStats();
             const urlParams = new URLSearchParams(window.location.search);
             const queryParam = urlParams.get('q');
             if (queryParam) {
                 document.getElementById("searchInput").value = queryParam;
                 handleSearchInput(true);
             }
-            sortAssets();
-            applyFilters();
             const targetId = urlParams.get('id');
             if (targetId) openDetails(targetId, true);
-            setTimeout(() => { 
-                document.body.classList.add('loaded'); 
-                startBackgroundLoading();
-            }, 50);
-        }
-        function startBackgroundLoading() {
-            if (bgLoadIndex >= database.length) return;
-            const item = database[bgLoadIndex];
-            if (item && item.gridThumb) {
-                const img = new Image();
-                img.onload = img.onerror = () => {
-                    bgLoadIndex++;
-                    setTimeout(startBackgroundLoading, 0);
-                };
-                img.src = item.gridThumb;
-            } else {
-                bgLoadIndex++;
-                startBackgroundLoading();
-            }
+            onFirstResult = () => setTimeout(() => document.body.classList.add('loaded'), 50);
+            window.addEventListener('scroll', onScrollPrefetch, { passive: true });
+            document.getElementById('assetList').addEventListener('mouseover', onHoverPrefetch);
+            document.getElementById('assetList').addEventListener('mouseout', e => { const card = e.target.closest('.asset'); if (card && !card.contains(e.relatedTarget)) clearTimeout(hoverTimer); });
+            runQuery();
         }
-        function calculateStats() {
-            let totalBinaryBytes = 0, totalImageBytes = 0;
-            const tagCounts = {}, spent = {};
-            database.forEach(item => {
-                totalBinaryBytes += item.bytes;
-                totalImageBytes += item.imgBytes;
-                item.tags.forEach(t => tagCounts[t] = (tagCounts[t] || 0) + 1);
-                if (item.priceValue > 0 && item.priceCurrency) spent[item.priceCurrency] = (spent[item.priceCurrency] || 0) + item.priceValue;
-            });
-            const topTags = Object.entries(tagCounts).sort((a,b) => b[1] - a[1]).slice(0, 10);
-            document.getElementById('commonTags').innerHTML = topTags.map(([tag]) => `<span class="tag-pill clickable" onclick="tagSearch('${tag.replace(/'/g, "\\\\'")}')">${tag}</span>`).join('');
-            document.getElementById('statCount').innerText = database.length;
-            document.getElementById('statSize').innerText = formatBytes(totalBinaryBytes);
-            document.getElementById('statImgSize').innerText = formatBytes(totalImageBytes);
-            document.getElementById('statSpent').innerText = Object.entries(spent).map(([cur, val]) => val.toLocaleString() + " " + cur).join(" / ") || "0";
+        function renderStats(stats) {
+            document.getElementById('commonTags').innerHTML = stats.topTags.map(tag => `<span class="tag-pill clickable" onclick="tagSearch('${tag.replace(/'/g, "\\\\'")}')">${tag}</span>`).join('');
+            document.getElementById('statCount').innerText = stats.count;
+            document.getElementById('statSize').innerText = formatBytes(stats.totalBinaryBytes);
+            document.getElementById('statImgSize').innerText = formatBytes(stats.totalImageBytes);
+            document.getElementById('statSpent').innerText = Object.entries(stats.spent).map(([cur, val]) => val.toLocaleString() + " " + cur).join(" / ") || "0";
             document.getElementById('statDate').innerText = new Date().toLocaleDateString();
         }
         function renderLibrary() {
@@ -450,6 +1175,7 @@ HTML_TEMPLATE = r"""<!doctype html>
             database.forEach(item => {
                 const el = document.getElementById('asset-' + item.id);
                 el.dataset.img = item.gridThumb;
+                if (item.lqip) el.dataset.lqip = item.lqip;
                 observer.observe(el);
             });
         }
@@ -498,7 +1224,7 @@ HTML_TEMPLATE = r"""<!doctype html>
             const modal = document.getElementById('detailModal');
             if (modal.classList.contains('active')) {
                 const id = new URLSearchParams(window.location.search).get('id');
-                const item = database.find(d => d.id === id);
+                const item = databaseById.get(id);
                 if (item) {
                     const rawModalName = (v && item.nameTrans) ? item.nameTrans : item.nameOrig;
                     document.getElementById("modalName").innerText = v ? cleanUIName(rawModalName, item.isAvatar) : rawModalName;
@@ -518,10 +1244,10 @@ HTML_TEMPLATE = r"""<!doctype html>
                 const newUrl = new URL(window.location);
                 if (query) newUrl.searchParams.set('q', query); else newUrl.searchParams.delete('q');
                 window.history.replaceState({}, '', newUrl);
-                applyFilters();
+                runQuery();
             };
             if (instant) performSearch();
-            else searchTimeout = setTimeout(performSearch, 300);
+            else searchTimeout = setTimeout(performSearch, 120);
         }
         function clearSearch() { const i = document.getElementById("searchInput"); i.value = ""; handleSearchInput(true); i.focus(); }
         function tagSearch(query, isAuthor = false) {
@@ -535,60 +1261,27 @@ HTML_TEMPLATE = r"""<!doctype html>
             window.scrollTo({ top: 0, behavior: 'smooth' });
         }
         function applyFilters(save = false) {
-            let query = document.getElementById("searchInput").value.toLowerCase();
             const mode = document.getElementById("adultFilter").value;
             const typeMode = document.getElementById("typeFilter").value;
-            const t = translations[state.lang] || translations['en'];
             if(save) { state.adultFilter = mode; state.typeFilter = typeMode; localStorage.setItem('adultFilter', mode); localStorage.setItem('typeFilter', typeMode); }
-            let count = 0, hiddenCount = 0;
-            const isAuthorSearch = query.startsWith('author:'), isRelSearch = query.startsWith('rel:'), isTypeSearch = query.startsWith('type:');
-            const authorQuery = isAuthorSearch ? query.replace('author:', '').trim() : '';
-            const relQuery = isRelSearch ? query.replace('rel:', '').trim() : '';
-            const typeSearchVal = isTypeSearch ? query.replace('type:', '').trim() : '';
-            database.forEach(item => {
-                const el = document.getElementById('asset-' + item.id);
-                const adultMatch = (mode === 'all') || (mode === 'hide' && !item.adult) || (mode === 'only' && item.adult);
-                const typeMatch = (typeMode === 'all') || (typeMode === 'avatar' && item.isAvatar) || (typeMode === 'asset' && !item.isAvatar);
-                let searchMatch = false;
-                if (isRelSearch) searchMatch = (item.id === relQuery) || item.links.includes(relQuery);
-                else if (isAuthorSearch) searchMatch = item.authorOrig.toLowerCase().includes(authorQuery) || item.authorTrans.toLowerCase().includes(authorQuery);
-                else if (isTypeSearch) searchMatch = (typeSearchVal === 'avatar' ? item.isAvatar : !item.isAvatar);
-                else searchMatch = item.searchBlob.includes(query);
-                if (searchMatch && adultMatch && typeMatch) { el.style.display = ""; count++; }
-                else { el.style.display = "none"; if (searchMatch) hiddenCount++; }
-            });
-            document.getElementById("searchInput").placeholder = t.searchPre + count + t.searchSuf;
-            const notice = document.getElementById("filterNotice");
-            if (hiddenCount > 0) { notice.innerText = t.hiddenResults.replace('{n}', hiddenCount).trim(); notice.style.display = "flex"; } else { notice.style.display = "none"; }
+            if (queryWorker) runQuery();
         }
         function sortAssets(save = false) {
-            const list = document.getElementById('assetList'), order = document.getElementById('sortOrder').value, invert = document.getElementById('sortInvert').checked;
+            const order = document.getElementById('sortOrder').value, invert = document.getElementById('sortInvert').checked;
             if(save) { localStorage.setItem('sortOrder', order); localStorage.setItem('sortInvert', invert); state.sortInvert = invert; }
-            const sorted = [...database].sort((a, b) => {
-                let res = 0;
-                if (order === 'id') res = isNaN(a.id) || isNaN(b.id) ? a.id.localeCompare(b.id) : parseInt(a.id) - parseInt(b.id);
-                else if (order === 'new') res = b.timestamp - a.timestamp;
-                else if (order === 'rel') res = b.wishCount - a.wishCount;
-                else if (order === 'size') res = b.bytes - a.bytes;
-                else {
-                    const nA = (state.showTrans && a.nameTrans) ? a.nameTrans : a.nameOrig;
-                    const nB = (state.showTrans && b.nameTrans) ? b.nameTrans : b.nameOrig;
-                    res = nA.toLowerCase().localeCompare(nB.toLowerCase());
-                }
-                return invert ? res * -1 : res;
-            });
-            sorted.forEach(item => list.appendChild(document.getElementById('asset-' + item.id)));
+            if (queryWorker) runQuery();
         }
         function openDetails(id, skipHistory = false) {
-            const item = database.find(d => d.id === id), t = translations[state.lang] || translations['en'];
+            const item = databaseById.get(id), t = translations[state.lang] || translations['en'];
             if(!item) return;
             const track = document.getElementById("carouselTrack"), blurTrack = document.getElementById("carouselBlurTrack");
             track.style.transition = 'none'; blurTrack.style.transition = 'none';
             track.style.transform = 'translateX(0)'; blurTrack.style.transform = 'translateX(0)';
             track.innerHTML = ""; blurTrack.innerHTML = "";
             switchTab('details'); currentCarouselIndex = 0; currentImages = item.allImages; 
-            const mainSlides = currentImages.map(img => `<div class="carousel-slide" onclick="openFullscreenImage('${img}')"><img src="${img}"></div>`).join('');
-            const blurSlides = currentImages.map(img => `<div class="carousel-blur-slide"><img src="${img}"></div>`).join('');
+            const sizes = item.imageSizes || [], blurs = item.blurs || [], dims = i => sizes[i] && sizes[i][0] ? ` width="${sizes[i][0]}" height="${sizes[i][1]}"` : '';
+            const mainSlides = currentImages.map((img, i) => `<div class="carousel-slide" onclick="openFullscreenImage('${img}', ${sizes[i] ? sizes[i].join(', ') : ''})"><img data-src="${img}"${dims(i)}></div>`).join('');
+            const blurSlides = currentImages.map((img, i) => blurs[i] ? `<div class="carousel-blur-slide"><img class="pre-blurred" data-src="${BLUR_DIR}${blurs[i]}.webp"></div>` : `<div class="carousel-blur-slide"><img data-src="${img}"></div>`).join('');
             track.innerHTML = mainSlides; blurTrack.innerHTML = blurSlides;
             updateCarousel(true);
             const rawTitle = (state.showTrans && item.nameTrans) ? item.nameTrans : item.nameOrig;
@@ -614,31 +1307,103 @@ HTML_TEMPLATE = r"""<!doctype html>
             if (item.links.length > 0) {
                 relSection.style.display = "block";
                 document.getElementById("relTitle").innerText = item.isAvatar ? t.labelComp : t.labelDesigned;
-                let relHtml = item.links.map(linkId => {
-                    const target = database.find(d => d.id === linkId);
-                    if (!target) return "";
-                    const rawTargetName = (state.showTrans && target.nameTrans) ? target.nameTrans : target.nameOrig;
-                    const n = state.showTrans ? cleanUIName(rawTargetName, target.isAvatar) : rawTargetName;
-                    return `<a href="#" class="asset-link-item" onclick="event.preventDefault(); openDetails('${linkId}')">
-                        <img class="asset-link-thumb" src="${target.gridThumb}">
-                        <span class="asset-link-name">${n}</span>
-                    </a>`;
-                }).join('') + `<a href="#" class="asset-link-view-all" onclick="event.preventDefault(); tagSearch('rel:${item.id}')"><span>${t.labelViewRel}</span></a>`;
+                let relHtml = item.links.map(linkId => renderAssetLink(databaseById.get(linkId))).join('') + `<a href="#" class="asset-link-view-all" onclick="event.preventDefault(); tagSearch('rel:${item.id}')"><span>${t.labelViewRel}</span></a>`;
                 document.getElementById("relationshipContainer").innerHTML = relHtml;
             } else relSection.style.display = "none";
-            document.getElementById("fileList").innerHTML = item.files.sort((a,b) => b.name.localeCompare(a.name, undefined, {numeric:true})).map(f => `
-                <li class="file-item"><a class="file-link" href="${f.path}" target="_blank">${f.name}</a><span style="color:#666; font-size:0.7rem;">${f.size}</span></li>`).join('');
+            const similar = (item.similar || []).map(simId => databaseById.get(simId)).filter(target => target && matchesAdultFilter(state.adultFilter, target));
+            document.getElementById("simSection").style.display = similar.length > 0 ? "block" : "none";
+            document.getElementById("similarContainer").innerHTML = similar.map(renderAssetLink).join('');
+            fileListItem = item; document.getElementById("fileList").dataset.item = ""; document.getElementById("fileList").innerHTML = "";
             const m = document.getElementById("detailModal"); m.classList.add('visible'); setTimeout(() => m.classList.add('active'), 10);
             document.title = baseTitle + " - #" + id;
             if (!skipHistory) { const newUrl = new URL(window.location); newUrl.searchParams.set('id', id); window.history.pushState({id: id}, '', newUrl); }
         }
+        function renderAssetLink(target) {
+            if (!target) return "";
+            const rawTargetName = (state.showTrans && target.nameTrans) ? target.nameTrans : target.nameOrig;
+            const n = state.showTrans ? cleanUIName(rawTargetName, target.isAvatar) : rawTargetName;
+            return `<a href="#" class="asset-link-item" onclick="event.preventDefault(); openDetails('${target.id}')">
+                <img class="asset-link-thumb" src="${target.gridThumb}">
+                <span class="asset-link-name">${n}</span>
+            </a>`;
+        }
+        // Binary listings live in sharded scripts outside the database, directories are rendered when expanded
+        function loadFileTree(item) {
+            const shard = item.fileShard;
+            if (!FILE_LISTS[shard]) return Promise.resolve(undefined);
+            if (!(shard in fileShardLoads)) fileShardLoads[shard] = loadScript(FILE_LISTS[shard]).catch(() => { delete fileShardLoads[shard]; }); // Retry on the next open
+            return fileShardLoads[shard].then(() => (window.BOOTH_FILES || {})[item.id]);
+        }
+        function showFiles(item) {
+            const list = document.getElementById("fileList");
+            if (list.dataset.item === item.id) return;
+            list.dataset.item = item.id; fileNodes = [];
+            loadFileTree(item).then(tree => { if (tree && list.dataset.item === item.id) list.innerHTML = renderFileEntries(tree, item.folder, 0, 0); });
+        }
+        function renderFileEntries(node, base, depth, start) {
+            const t = translations[state.lang] || translations['en'], pad = `style="padding-left:${12 + depth * 16}px"`;
+            const cmp = (a, b) => b.localeCompare(a, undefined, {numeric:true});
+            const entries = Object.keys(node.d || {}).sort(cmp).map(name => ({ name, dir: node.d[name] }))
+                .concat((node.f || []).slice().sort((a, b) => cmp(a[0], b[0])).map(([name, bytes, dupes]) => ({ name, bytes, dupes })));
+            let html = entries.slice(start, start + FILE_PAGE_SIZE).map(e => {
+                const path = base + '/' + encodeURIComponent(e.name);
+                if (e.dir) {
+                    fileNodes.push({ node: e.dir, base: path, depth: depth + 1 });
+                    return `<li class="file-item file-dir" ${pad} onclick="toggleFileDir(this, ${fileNodes.length - 1})"><span class="file-link">${e.name}/</span><span class="file-size">${e.dir.n} ${e.dir.n === 1 ? t.fileSingular : t.filePlural} · ${formatBytes(e.dir.b)}</span></li>`;
+                }
+                const dupes = e.dupes ? `<div class="file-dupes">${t.labelAlsoIn}: ${e.dupes.map(dupeId => renderDupeLink(databaseById.get(dupeId))).filter(Boolean).join(', ')}</div>` : '';
+                return `<li class="file-item" ${pad}><div class="file-main"><a class="file-link" href="${path}" target="_blank">${e.name}</a>${dupes}</div><span class="file-size">${formatBytes(e.bytes)}</span></li>`;
+            }).join('');
+            if (start + FILE_PAGE_SIZE < entries.length) {
+                fileNodes.push({ node, base, depth, start: start + FILE_PAGE_SIZE });
+                html += `<li class="file-item file-more" ${pad} onclick="showMoreFiles(this, ${fileNodes.length - 1})">${t.moreTags.replace('{n}', entries.length - start - FILE_PAGE_SIZE)}</li>`;
+            }
+            return html;
+        }
+        function toggleFileDir(el, idx) {
+            const open = el.classList.toggle('open');
+            if (!el.nextElementSibling || !el.nextElementSibling.classList.contains('file-children')) {
+                const n = fileNodes[idx];
+                el.insertAdjacentHTML('afterend', `<li class="file-children"><ul>${renderFileEntries(n.node, n.base, n.depth, 0)}</ul></li>`);
+            }
+            el.nextElementSibling.hidden = !open;
+        }
+        function showMoreFiles(el, idx) {
+            const n = fileNodes[idx];
+            el.insertAdjacentHTML('afterend', renderFileEntries(n.node, n.base, n.depth, n.start));
+            el.remove();
+        }
+        function renderDupeLink(target) {
+            if (!target) return "";
+            const n = (state.showTrans && target.nameTrans) ? target.nameTrans : target.nameOrig;
+            return `<a href="#" onclick="event.preventDefault(); openDetails('${target.id}')">${n}</a>`;
+        }
         function switchTab(tabId) {
             document.querySelectorAll('.tab-pane, .tab-btn').forEach(el => el.classList.remove('active'));
             document.getElementById('pane-' + tabId).classList.add('active');
             document.getElementById('tab-' + tabId).classList.add('active');
+            if (tabId === 'files' && fileListItem) showFiles(fileListItem);
         }
-        function carouselNext(dir) { if (currentImages.length <= 1) return; currentCarouselIndex = (currentCarouselIndex + dir + currentImages.length) % currentImages.length; updateCarousel(); }
-        function updateCarousel(instant = false) {
+        function carouselNext(dir) { if (currentImages.length <= 1) return; currentCarouselIndex = (currentCarouselIndex + dir + currentImages.length) % currentImages.length; updateCarousel(false, dir); }
+        function loadCarouselSlides(dir) {
+            // Only the current slide and its neighbours hold an image, the next ones in the direction of travel are prefetched
+            const n = currentImages.length, slides = document.getElementById("carouselTrack").children, blurSlides = document.getElementById("carouselBlurTrack").children;
+            for (let i = 0; i < n; i++) {
+                const d = Math.abs(i - currentCarouselIndex), dist = Math.min(d, n - d);
+                for (const slide of [slides[i], blurSlides[i]]) {
+                    const img = slide && slide.firstElementChild;
+                    if (!img) continue;
+                    if (dist <= CAROUSEL_NEIGHBOURS) { if (!img.getAttribute('src')) img.src = img.dataset.src; }
+                    else if (dist > CAROUSEL_KEEP && img.getAttribute('src')) img.removeAttribute('src');
+                }
+            }
+            for (let k = CAROUSEL_NEIGHBOURS + 1; dir && k <= CAROUSEL_NEIGHBOURS + CAROUSEL_AHEAD && k < n; k++) {
+                const i = ((currentCarouselIndex + dir * k) % n + n) % n;
+                prefetch(slides[i].firstElementChild.dataset.src, PRIORITY_AHEAD);
+                prefetch(blurSlides[i].firstElementChild.dataset.src, PRIORITY_AHEAD);
+            }
+        }
+        function updateCarousel(instant = false, dir = 0) {
             const track = document.getElementById("carouselTrack"), blurTrack = document.getElementById("carouselBlurTrack"), dots = document.getElementById("carouselDots");
             const trans = instant ? 'none' : 'transform 0.3s cubic-bezier(0.4, 0, 0.2, 1)';
             track.style.transition = trans; blurTrack.style.transition = trans;
@@ -649,10 +1414,13 @@ HTML_TEMPLATE = r"""<!doctype html>
             document.getElementById("carouselNext").style.display = showUI ? "block" : "none";
             dots.style.display = showUI ? "flex" : "none";
             if (showUI) { dots.innerHTML = currentImages.map((_, i) => `<div class="dot ${i === currentCarouselIndex ? 'active' : ''}" onclick="currentCarouselIndex=${i}; updateCarousel()"></div>`).join(''); }
+            loadCarouselSlides(dir);
         }
-        function openFullscreenImage(src) {
+        function openFullscreenImage(src, width, height) {
             const viewer = document.getElementById('fullscreenImageViewer');
             const img = document.getElementById('fullscreenImage');
+            const fit = width && height ? Math.min(window.innerWidth * 0.95 / width, window.innerHeight * 0.95 / height, 1) : 0;
+            img.style.width = fit ? Math.round(width * fit) + 'px' : ''; img.style.height = fit ? Math.round(height * fit) + 'px' : '';
             img.src = src;
             viewer.classList.add('visible');
             requestAnimationFrame(() => {
@@ -674,7 +1442,7 @@ HTML_TEMPLATE = r"""<!doctype html>
         }
         window.onpopstate = () => { const p = new URLSearchParams(window.location.search); if (p.get('id')) openDetails(p.get('id'), true); else closeModal(true); };
         document.addEventListener('keydown', e => { if(e.key === "Escape") { if(document.getElementById('fullscreenImageViewer').classList.contains('active')) closeFullscreenImage(); else { closeModal(); toggleMenu(null, true); } } if(e.key === "ArrowRight") carouselNext(1); if(e.key === "ArrowLeft") carouselNext(-1); });
-        init();
+        loadDatabase().then(items => { database = items; databaseById = new Map(items.map(d => [d.id, d])); init(); });
     </script>
 </body>
 </html>
@@ -687,14 +1455,48 @@ def get_readable_size(size_bytes):
     return f"{size_bytes:.1f}TB"
 
 def get_dir_data(binary_folder):
-    files, total_size = [], 0
-    if os.path.exists(binary_folder):
-        for root, _, filenames in os.walk(binary_folder):
-            for f in filenames:
-                fp = os.path.join(root, f); size = os.path.getsize(fp); total_size += size
-                rel = os.path.relpath(fp, start=os.getcwd()).replace('\\', '/')
-                files.append({"name": f, "path": quote(rel), "size": get_readable_size(size)})
-    return files, total_size
+    """Binary listing as a tree {"b": bytes, "n": file count, "d": {dir name: subtree}, "f": [[file name, bytes], ...]}."""
+    tree = {"b": 0, "n": 0}
+    if not os.path.exists(binary_folder): return tree
+    for root, dirs, filenames in os.walk(binary_folder):
+        dirs.sort()
+        rel = os.path.relpath(root, binary_folder)
+        chain = [tree]
+        for part in ([] if rel == '.' else rel.split(os.sep)): chain.append(chain[-1].setdefault("d", {}).setdefault(part, {"b": 0, "n": 0}))
+        for f in sorted(filenames):
+            size = os.path.getsize(os.path.join(root, f))
+            chain[-1].setdefault("f", []).append([f, size])
+            for node in chain: node["b"] += size; node["n"] += 1
+    return tree
+
+def iter_tree_files(tree, parts=()):
+    for entry in tree.get("f", []): yield parts + (entry[0],), entry
+    for name, sub in tree.get("d", {}).items(): yield from iter_tree_files(sub, parts + (name,))
+
+def file_shard_count(item_count, previous):
+    """Power of two giving about FILE_LIST_SHARD_ITEMS items per shard. The previous count is kept until it is off by
+    more than a factor of two, so items only move between shards when the library size changes substantially."""
+    ideal = 1
+    while ideal * FILE_LIST_SHARD_ITEMS < item_count: ideal *= 2
+    return previous if previous in (ideal // 2, ideal, ideal * 2) else ideal
+
+def file_shard(item_id, shards): return binascii.crc32(item_id.encode('utf-8')) % shards
+
+def write_file_lists(shards):
+    """Publishes the non-empty shards, empty ones map to None. Shards from a previous count are retired."""
+    by_shard = {}
+    for item_id in sorted(existing_database):
+        shard = file_shard(item_id, shards)
+        if existing_database[item_id].get('fileShard') != shard: existing_database[item_id]['fileShard'] = shard
+        by_shard.setdefault(shard, []).append(item_id)
+    paths = []
+    for shard in range(shards):
+        if shard not in by_shard: paths.append(None); continue
+        payload = json.dumps({item_id: existing_database[item_id]['files'] for item_id in by_shard[shard]}, ensure_ascii=False, separators=(',', ':'))
+        paths.append(publish_hashed(os.path.join(FILE_LIST_DIR, f"files_{shard}.js"), f"{FILE_LIST_PREFIX}{payload});").replace('\\', '/'))
+    current = {os.path.normpath(p) for p in paths if p}
+    retired_versions.update(p for p in glob.glob(os.path.join(FILE_LIST_DIR, "files_*.js")) if os.path.normpath(p) not in current)
+    return paths
 
 def get_dir_fingerprint(binary_folder):
     if not os.path.exists(binary_folder): return ""
@@ -705,30 +1507,123 @@ def get_dir_fingerprint(binary_folder):
             fingerprint.append(f"{f}:{os.path.getsize(fp)}")
     return "|".join(sorted(fingerprint))
 
-def get_image_folder_size(folder_path):
-    total_size = 0
-    for f in os.listdir(folder_path):
-        if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.gif')): total_size += os.path.getsize(os.path.join(folder_path, f))
-    return total_size
+def hash_file(path, size, partial):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        if not partial:
+            for chunk in iter(lambda: f.read(1 << 20), b''): sha.update(chunk)
+            return sha.hexdigest()
+        sha.update(f.read(CONTENT_PARTIAL_BYTES))
+        if size > 2 * CONTENT_PARTIAL_BYTES: f.seek(-CONTENT_PARTIAL_BYTES, os.SEEK_END)
+        sha.update(f.read(CONTENT_PARTIAL_BYTES))
+    return sha.hexdigest()
+
+def build_content_index(entries):
+    """entries: (item_id, path, online) for every Binary file. Files are grouped by size, only collisions are
+    hashed (head/tail first, then in full) and hashes are reused while the stat signature is unchanged.
+    Returns the duplicate groups as (size, [(item_id, path), ...]) and the refreshed index."""
+    index, by_size = {}, {}
+    for item_id, path, online in entries:
+        cached = content_index.get(path)
+        if online:
+            try: st = os.stat(path)
+            except OSError: continue
+            sig = [st.st_size, st.st_mtime_ns]
+        elif cached: sig = cached['sig'] # Offline root, trust the last known state
+        else: continue
+        if sig[0] < CONTENT_INDEX_MIN_BYTES: continue
+        by_size.setdefault(sig[0], []).append((item_id, path, online, cached if cached and cached.get('sig') == sig else {"sig": sig}))
+
+    def refine(groups, key):
+        todo = [(path, e) for group in groups for _, path, online, e in group if key not in e and online]
+        def work(task):
+            path, e = task
+            try: e[key] = e['partial'] if key == 'full' and e['sig'][0] <= 2 * CONTENT_PARTIAL_BYTES else hash_file(path, e['sig'][0], key == 'partial')
+            except OSError: pass
+        with ThreadPoolExecutor(max_workers=MAX_ROOT_IO_WORKERS) as ex: list(ex.map(work, todo))
+        split = {}
+        for group in groups:
+            for member in group:
+                if key in member[3]: split.setdefault((member[3]['sig'][0], member[3][key]), []).append(member)
+        return [g for g in split.values() if len(g) > 1]
+
+    size_collisions = [g for g in by_size.values() if len(g) > 1]
+    duplicates = refine(refine(size_collisions, 'partial'), 'full')
+    for group in size_collisions:
+        for _, path, _, e in group:
+            if 'partial' in e: index[path] = e
+    return [(g[0][3]['sig'][0], [(item_id, path) for item_id, path, _, _ in g]) for g in duplicates], index
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+IMAGE_TOKEN_RE = re.compile(r'[a-fA-F0-9-]{15,}') # Booth image UUIDs, shared by the web URL and the downloaded file name
+
+def get_image_index(folder_path):
+    """Images of an item folder in one scandir pass per build, sorted by name. Dimensions come from the file header and are
+    reused from image_index while bytes and mtime are unchanged."""
+    if folder_path in folder_images: return folder_images[folder_path]
+    cached, entries, images = image_index.get(folder_path, {}), {}, []
+    try: listing = sorted(os.scandir(folder_path), key=lambda e: e.name)
+    except OSError: return images
+    for entry in listing:
+        if not entry.name.lower().endswith(IMAGE_EXTENSIONS) or not entry.is_file(): continue
+        st = entry.stat()
+        meta = cached.get(entry.name)
+        if not meta or meta[:2] != [st.st_size, st.st_mtime_ns]:
+            try:
+                with Image.open(entry.path) as img: meta = [st.st_size, st.st_mtime_ns, img.format or "", *img.size]
+            except Exception: meta = [st.st_size, st.st_mtime_ns, "", 0, 0]
+        entries[entry.name] = meta
+        token = IMAGE_TOKEN_RE.search(entry.name)
+        images.append({"name": entry.name, "bytes": meta[0], "format": meta[2], "width": meta[3], "height": meta[4], "token": token.group(0) if token else ""})
+    image_index[folder_path] = entries
+    folder_images[folder_path] = images
+    return images
+
+def image_crc(path):
+    """CRC32 of an item image, kept in its image_index entry until size or mtime change."""
+    folder, name = os.path.split(path)
+    try: st = os.stat(path)
+    except OSError: return None
+    meta = image_index.get(folder, {}).get(name)
+    if not meta or meta[:2] != [st.st_size, st.st_mtime_ns]: return calculate_crc32(path)
+    if len(meta) < 6:
+        crc = calculate_crc32(path)
+        if crc: meta.append(crc)
+        return crc
+    return meta[5]
+
+class AdultClassifier:
+    """Filter keywords compiled once into a single alternation, longest first so the reported keyword is the most specific."""
+    def __init__(self, filters):
+        self.version = hashlib.sha1(json.dumps(sorted(filters.items()), ensure_ascii=False).encode('utf-8')).hexdigest()
+        parts, self.keywords = [], {}
+        for keyword, (whole_word, case_sensitive) in sorted(filters.items(), key=lambda f: (-len(f[0]), f[0])):
+            part = re.escape(keyword) if case_sensitive else f"(?i:{re.escape(keyword)})"
+            parts.append(rf"(?<!\w){part}(?!\w)" if whole_word else part)
+            self.keywords.setdefault(keyword if case_sensitive else keyword.casefold(), keyword)
+        self.pattern = re.compile("|".join(parts)) if parts else None # No filters must never match
 
-def is_adult_content(text): return bool(re.search("|".join(ADULT_KEYWORDS), str(text), re.IGNORECASE))
+    def match(self, *texts):
+        if not self.pattern: return ""
+        for text in texts:
+            m = self.pattern.search(text) if text else None
+            if m: return self.keywords.get(m.group(0)) or self.keywords.get(m.group(0).casefold(), m.group(0))
+        return ""
 
-def get_all_local_images(asset_id, folder_path, web_urls=None):
-    if web_urls is None: web_urls = []
-    local_files = sorted([f for f in os.listdir(folder_path) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.gif'))])
-    ordered_images = []; used_files = set()
-    for url in web_urls:
+def get_all_local_images(folder_path, images, web_urls=None):
+    """Orders local images like the Booth page, falling back to the web URL when no local copy exists. Returns paths and [width, height] pairs."""
+    by_token = {img['token']: img for img in images if img['token']}
+    ordered, used = [], set()
+    for url in web_urls or []:
         if not url: continue
-        tokens = re.findall(r'([a-fA-Z0-9-]{15,})', url)
-        found = False
-        for token in tokens:
-            for f in local_files:
-                if token in f: ordered_images.append(quote(os.path.join(folder_path, f).replace('\\', '/'))); used_files.add(f); found = True; break
-            if found: break
-        if not found: ordered_images.append(url)
-    for f in local_files:
-        if f not in used_files: ordered_images.append(quote(os.path.join(folder_path, f).replace('\\', '/')))
-    return ordered_images
+        tokens = IMAGE_TOKEN_RE.findall(url)
+        match = next((by_token[t] for t in tokens if t in by_token), None)
+        if match is None: match = next((img for t in tokens for img in images if t in img['name']), None) # Irregular file names
+        ordered.append(match or url)
+        if match: used.add(match['name'])
+    ordered += [img for img in images if img['name'] not in used]
+    return ([to_web_path(os.path.join(folder_path, img['name'])) if isinstance(img, dict) else img for img in ordered],
+            [[img['width'], img['height']] if isinstance(img, dict) else [0, 0] for img in ordered])
 
 def parse_price(price_str):
     if not price_str or "free" in str(price_str).lower(): return 0.0, "FREE"
@@ -743,21 +1638,22 @@ def create_asset_data(asset_id, asset_name, author_name, web_images, booth_url,
     vrc_av = re.search(r'(https://vrchat\.com/home/avatar/avtr_[a-f0-9-]+)', description)
     vrc_wr = re.search(r'(https://vrchat\.com/home/(?:world/|launch\?worldId=)wrld_[a-f0-9-]+)', description)
     if (vrc_av or vrc_wr) and "⚙Preview" not in tags: tags.append("⚙Preview")
-    binary_folder = os.path.join(folder_path, 'Binary'); files, total_bytes = get_dir_data(binary_folder)
-    img_bytes, all_imgs = get_image_folder_size(folder_path), get_all_local_images(asset_id, folder_path, web_images)
-    name_trans, author_trans = translation_cache.get(asset_name.strip(), ""), translation_cache.get(author_name.strip(), "")
+    binary_folder = os.path.join(folder_path, 'Binary'); files = get_dir_data(binary_folder)
+    images = get_image_index(folder_path)
+    img_bytes, (all_imgs, img_sizes) = sum(img['bytes'] for img in images), get_all_local_images(folder_path, images, web_images)
+    name_trans, author_trans = cached_translation(asset_name), cached_translation(author_name)
     price_val, price_cur = parse_price(price_str)
-    search_blob = f"{asset_id} {asset_name} {name_trans} {author_name} {author_trans} {' '.join(tags)}".lower()
-    return { 
+    search_blob = make_search_blob(asset_id, asset_name, name_trans, author_name, author_trans, tags)
+    return ItemRecord({ 
         "id": asset_id, "nameOrig": asset_name, "nameTrans": name_trans, "authorOrig": author_name, "authorTrans": author_trans, 
-        "gridThumb": all_imgs[0] if all_imgs else "", "allImages": all_imgs, "bytes": total_bytes, "imgBytes": img_bytes, 
-        "fileCount": len(files), "files": files, "tags": tags, "adult": is_adult, "searchBlob": search_blob, 
-        "folder": quote(os.path.relpath(binary_folder, start=os.getcwd()).replace('\\', '/')), "boothUrl": booth_url, 
+        "gridThumb": all_imgs[0] if all_imgs else "", "lqip": "", "allImages": all_imgs, "imageSizes": img_sizes, "bytes": files["b"], "imgBytes": img_bytes, 
+        "fileCount": files["n"], "files": files, "tags": tags, "adult": is_adult, "adultSource": is_adult, "adultKeyword": "", "searchBlob": search_blob, 
+        "folder": to_web_path(binary_folder), "boothUrl": booth_url, 
         "wishCount": wish_count, "timestamp": int(os.path.getctime(folder_path)), "priceValue": price_val, 
         "priceCurrency": price_cur, "limited": limited, "descOrig": description, "descTrans": description_cache.get(asset_id, ""), 
         "vrcAvatarLink": vrc_av.group(1) if vrc_av else "", "vrcWorldLink": vrc_wr.group(1) if vrc_wr else "", 
-        "isAvatar": is_avatar, "links": related_links or [] 
-    }
+        "isAvatar": is_avatar, "links": related_links or [], "similar": []
+    })
 
 def get_avatar_search_profile(asset_id, orig_name, trans_name, tags):
     search_terms, groups = set(), set()
@@ -777,6 +1673,39 @@ def get_avatar_search_profile(asset_id, orig_name, trans_name, tags):
         if part.lower() not in FORBIDDEN_NAMES: search_terms.add(part.lower())
     return {"names": list(search_terms), "groups": list(groups)}
 
+def normalize_japanese(text):
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    return ''.join(chr(ord(c) + 0x60) if 'ぁ' <= c <= 'ゖ' else c for c in text) # Fold hiragana onto katakana
+
+JP_STOPWORDS_NORMALIZED = sorted({normalize_japanese(w) for w in JP_NAME_STOPWORDS}, key=len, reverse=True)
+
+def get_japanese_name_terms(asset_id, orig_name):
+    terms = set()
+    alias = alias_data.get(str(asset_id))
+    candidates = [orig_name] + [str(a) for a in (alias if isinstance(alias, list) else [alias] if alias else []) if contains_japanese(a)]
+    for cand in candidates:
+        for run in re.findall(r'[\u30a0-\u30ff\u3400-\u4dbf\u4e00-\u9fff]+', normalize_japanese(cand)):
+            for w in JP_STOPWORDS_NORMALIZED: run = run.replace(w, " ")
+            terms.update(t for t in run.split() if len(t) >= 2 and t.strip('ー'))
+    return list(terms)
+
+def jp_ngrams(text, n=2): return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def build_japanese_name_index(jp_profiles):
+    index = {}
+    for av_id, terms in jp_profiles.items():
+        for term in terms:
+            for g in jp_ngrams(term): index.setdefault(g, set()).add((av_id, term))
+    return index
+
+def find_japanese_matches(asset_info, index):
+    title, tags, vars = asset_info
+    ctx = normalize_japanese(" ".join([title] + list(tags) + list(vars)))
+    hits = {}
+    for g in jp_ngrams(ctx):
+        for key in index.get(g, ()): hits[key] = hits.get(key, 0) + 1
+    return {av_id for (av_id, term), count in hits.items() if count == len(jp_ngrams(term)) and term in ctx}
+
 def check_english_match(asset_info, profile):
     title, tags, vars = asset_info
     ctx = (title + " " + " ".join(tags) + " " + " ".join(vars)).lower()
@@ -788,109 +1717,300 @@ def check_english_match(asset_info, profile):
         if norm and len(norm) > 2 and re.search(r'\b' + re.escape(norm) + r'\b', blob): return True
     return False
 
-asset_data_list, short_strings_to_translate, desc_tasks, avatar_profiles = [], [], {}, {}
-current_folders = sorted(os.listdir(ROOT_FOLDER))
-new_global_meta = {}
-dirty_ids = set()
+MERSENNE_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(MINHASH_PERMUTATIONS)
+MINHASH_PARAMS = [(_minhash_rng.randrange(1, MERSENNE_PRIME), _minhash_rng.randrange(0, MERSENNE_PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
 
-deleted_ids = [k for k in global_meta if k not in current_folders]
-if deleted_ids:
-    logger.info(f"[Cleanup] Removing {len(deleted_ids)} items...")
-    for d_id in deleted_ids:
-        existing_database.pop(d_id, None)
-        description_cache.pop(d_id, None)
-        thumb_meta.pop(d_id, None)
-        t_path = os.path.join(IMG_OUT_DIR, f"{d_id}_thumb.webp")
-        if os.path.exists(t_path): os.remove(t_path)
-        for f in glob.glob(os.path.join(GALLERY_OUT_DIR, f"{d_id}_*")):
+def get_similarity_tokens(asset_info):
+    title, tags, vars = asset_info
+    tokens = {f"t:{t.strip()}" for t in tags if t.strip()}
+    for text in [title] + list(vars):
+        tokens.update(f"w:{w}" for w in re.findall(r'\w{2,}', text.lower()) if w not in FORBIDDEN_NAMES)
+    return tokens
+
+def compute_minhash(tokens):
+    hashes = [binascii.crc32(t.encode('utf-8')) for t in tokens]
+    if not hashes: return ""
+    sig = [min((a * h + b) % MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF for a, b in MINHASH_PARAMS]
+    return base64.b64encode(struct.pack(f"<{MINHASH_PERMUTATIONS}I", *sig)).decode('ascii')
+
+def decode_minhash(encoded):
+    raw = base64.b64decode(encoded)
+    return struct.unpack(f"<{MINHASH_PERMUTATIONS}I", raw) if len(raw) == MINHASH_PERMUTATIONS * 4 else None
+
+def read_variations(item_id):
+    page = os.path.join(item_roots.get(item_id, ""), item_id, "_BoothPage.json")
+    try:
+        with open(page, 'r', encoding='utf-8') as f: data = json.load(f)
+        return [v['name'] for v in data.get('variations', []) if isinstance(v, dict) and v.get('name')]
+    except Exception: return []
+
+def update_similarity(item_id, name, tags, variations=None):
+    """Every signature hashes the same input: current translation of the name, non-system tags and variation names.
+    Entries are keyed on a digest of that input, so recovered terms or new glossary entries refresh them."""
+    entry = similarity_cache.get(item_id)
+    entry = entry if isinstance(entry, dict) else {} # Signatures from before the canonical input are rebuilt
+    if variations is None: variations = entry["vars"] if "vars" in entry else read_variations(item_id)
+    info = ((cached_translation(name) or name).lower(),
+            [(cached_translation(t) or t).lower() for t in tags if t and not t.startswith("⚙")],
+            [(cached_translation(v) or v).lower() for v in variations])
+    digest = text_digest(json.dumps(info, ensure_ascii=False))
+    if entry.get("input") != digest or entry.get("vars") != variations:
+        similarity_cache[item_id] = {"input": digest, "sig": compute_minhash(get_similarity_tokens(info)), "vars": variations}
+
+def find_similar_items(signatures):
+    rows, buckets, candidates, similar = MINHASH_PERMUTATIONS // LSH_BANDS, {}, {}, {}
+    for item_id, sig in signatures.items():
+        for b in range(LSH_BANDS): buckets.setdefault((b, sig[b * rows:(b + 1) * rows]), []).append(item_id)
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > LSH_MAX_BUCKET: continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                candidates.setdefault(a, set()).add(b); candidates.setdefault(b, set()).add(a)
+    for item_id, others in candidates.items():
+        sig = signatures[item_id]
+        scored = sorted(((sum(x == y for x, y in zip(sig, signatures[o])) / MINHASH_PERMUTATIONS, o) for o in others), key=lambda s: (-s[0], s[1]))
+        similar[item_id] = [o for score, o in scored[:SIMILAR_TOP_K] if score >= SIMILAR_MIN_SCORE]
+    return similar
+
+def write_database_delta(items, snapshot, file_lists):
+    global db_manifest
+    new_digests = {item['id']: item_digest(item) for item in items}
+    if previous_digests is None or not db_manifest.get('lineage'):
+        db_manifest = {"lineage": os.urandom(6).hex(), "version": 1, "snapshot": snapshot, "fileShards": len(file_lists), "fileLists": file_lists, "deltas": []}
+    else:
+        db_manifest["fileShards"], db_manifest["fileLists"] = len(file_lists), file_lists
+        added = {item['id']: item for item in items if item['id'] not in previous_digests}
+        changed = {item['id']: item for item in items if item['id'] in previous_digests and previous_digests[item['id']] != new_digests[item['id']]}
+        removed = [k for k in previous_digests if k not in new_digests]
+        db_manifest["snapshot"] = snapshot
+        if not (added or changed or removed):
+            write_atomic(MANIFEST_JS_FILE, f"window.BOOTH_MANIFEST = {json.dumps(db_manifest)};")
+            return
+        version = db_manifest['version'] + 1
+        def dump_delta(f):
+            f.write(f"window.BOOTH_DELTAS = window.BOOTH_DELTAS || {{}}; window.BOOTH_DELTAS[{version}] = ")
+            json.dump({"added": added, "changed": changed, "removed": removed}, f, ensure_ascii=False, default=ItemRecord.to_dict); f.write(";")
+        delta_path = publish_hashed(os.path.join(DELTA_DIR, f"delta_{version}.js"), dump_delta, stale=()).replace('\\', '/')
+        logger.info(f"[Build] Delta v{version}: {len(added)} added, {len(changed)} changed, {len(removed)} removed")
+        db_manifest["version"] = version
+        db_manifest["deltas"] = [d for d in db_manifest.get("deltas", []) if d["version"] > version - DELTA_HISTORY] + [{"version": version, "file": delta_path}]
+    kept = {os.path.basename(d["file"]) for d in db_manifest["deltas"]}
+    for f in glob.glob(os.path.join(DELTA_DIR, "delta_*.js")):
+        if os.path.basename(f) not in kept:
             try: os.remove(f)
             except OSError: pass
-    try:
-        with open(DESC_CACHE_FILE, 'w', encoding='utf-8') as f: json.dump(description_cache, f, ensure_ascii=False, indent=2)
-        with open(THUMB_META_FILE, 'w', encoding='utf-8') as f: json.dump(thumb_meta, f)
-    except Exception:
-         logger.error(f"Failed to save cache during cleanup:\n{traceback.format_exc()}")
+    write_atomic(MANIFEST_JS_FILE, f"window.BOOTH_MANIFEST = {json.dumps(db_manifest)};")
 
-logger.info(f"[Build] Identifying updates...")
-for folder in current_folders:
-    path = os.path.join(ROOT_FOLDER, folder)
-    mtime = os.path.getmtime(path)
-    binary_path = os.path.join(path, "Binary")
-    files_fingerprint = get_dir_fingerprint(binary_path)
-    
-    meta_entry = global_meta.get(folder, {})
-    if isinstance(meta_entry, (int, float)): meta_entry = {"time": meta_entry, "files": ""}
-    
-    needs_update = (FORCE_TRANSLATION or 
-                    folder not in global_meta or 
-                    meta_entry.get("time") < mtime or 
-                    meta_entry.get("files") != files_fingerprint or
-                    folder not in existing_database or 
-                    folder in error_ids)
-    
-    new_global_meta[folder] = {"time": mtime, "files": files_fingerprint}
-    
-    if not needs_update: continue
-    dirty_ids.add(folder)
+def slim_source(data):
+    # Keep only what later stages read so the raw page JSON can be freed right after parsing
+    slim = {k: data[k] for k in ('url', 'price', 'is_adult', 'related_booth_ids') if k in data}
+    slim['tags'] = [{'name': t.get('name', '')} if isinstance(t, dict) else t for t in data.get('tags', [])]
+    slim['variations'] = [{'name': v.get('name', '')} for v in data.get('variations', []) if isinstance(v, dict)]
+    slim['images'] = [{'original': img.get('original', '')} for img in data.get('images', []) if isinstance(img, dict)]
+    return slim
+
+def read_item_source(folder, path):
     manual_json = os.path.join(path, "item_descriptor.json")
-    
+    wants_desc = lambda desc: not SKIP_TRANSLATION and desc and (FORCE_TRANSLATION or (folder not in description_cache and ledger_due(f"desc:{folder}"))) and contains_japanese(desc)
     if os.path.exists(manual_json):
         try:
             with open(manual_json, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 name, author, desc = data.get('name', 'N/A'), data.get('author', 'N/A'), data.get('description', '')
                 tags = data.get('tags', [])
-                short_strings_to_translate.extend([name, author] + tags)
-                asset_data_list.append(('custom', folder, (name, author, data, desc), path, data.get('wish_count', 0), data.get('is_avatar', False)))
-                if not SKIP_TRANSLATION and desc and (FORCE_TRANSLATION or folder not in description_cache or folder in error_ids) and contains_japanese(desc): 
-                    desc_tasks[folder] = desc
+                return ('custom', folder, (name, author, slim_source(data), desc), path, data.get('wish_count', 0), data.get('is_avatar', False)), [name, author] + tags, desc if wants_desc(desc) else None
         except Exception:
             logger.error(f"Failed to process {manual_json}:\n{traceback.format_exc()}")
-        continue
+        return None
 
     jsons = glob.glob(os.path.join(path, "_BoothPage.json")) or glob.glob(os.path.join(path, "_BoothInnerHtmlList.json"))
-    if not jsons: continue
+    if not jsons: return None
     try:
         with open(jsons[0], 'r', encoding='utf-8') as f:
             if jsons[0].endswith('_BoothPage.json'):
                 data = json.load(f)
                 name, author, desc = data.get('name', 'N/A'), data.get('shop', {}).get('name', 'N/A'), data.get('description', '')
                 tags = [t.get('name', '') for t in data.get('tags', [])]
-                short_strings_to_translate.extend([name, author] + tags)
                 cat = data.get('category', {})
                 is_av = cat.get('id') == 208 or cat.get('name') in ["3D Characters", "3Dキャラクター", "3D캐릭터"] if cat else False
-                asset_data_list.append(('json', folder, (name, author, data, desc), path, data.get('wish_lists_count', 0), is_av))
-                if not SKIP_TRANSLATION and desc and (FORCE_TRANSLATION or folder not in description_cache or folder in error_ids) and contains_japanese(desc): 
-                    desc_tasks[folder] = desc
+                return ('json', folder, (name, author, slim_source(data), desc), path, data.get('wish_lists_count', 0), is_av), [name, author] + tags, desc if wants_desc(desc) else None
             else:
                 data = json.load(f)
                 item = data[0] if data else ""
                 if item:
                     n_m, a_m = (re.search(r'break-all\">(.*?)<\/div>', item) or re.search(r'>(.*?)<\/div>', item)), re.search(r'text-text-gray600 break-all\">(.*?)<\/div>', item)
                     name, author = n_m.group(1) if n_m else "N/A", a_m.group(1) if a_m else "N/A"
-                    short_strings_to_translate.extend([name, author])
-                    asset_data_list.append(('limited', folder, (name, author, item, ""), path, 0, False))
+                    return ('limited', folder, (name, author, item, ""), path, 0, False), [name, author], None
     except Exception:
         logger.error(f"Failed to process {jsons[0]}:\n{traceback.format_exc()}")
+    return None
+
+def identify_folder(root, folder):
+    path = os.path.join(root, folder)
+    mtime = os.path.getmtime(path)
+    files_fingerprint = get_dir_fingerprint(os.path.join(path, "Binary"))
+    partition = root_meta.get(root, {})
+    meta_entry = partition.get(folder, {})
+    if isinstance(meta_entry, (int, float)): meta_entry = {"time": meta_entry, "files": ""}
+    needs_update = (FORCE_TRANSLATION or 
+                    folder not in partition or 
+                    meta_entry.get("time") < mtime or 
+                    meta_entry.get("files") != files_fingerprint or
+                    folder not in existing_database)
+    return {"time": mtime, "files": files_fingerprint}, needs_update, read_item_source(folder, path) if needs_update else None
+
+def scan_root(root):
+    folders = sorted(f for f in os.listdir(root) if os.path.isdir(os.path.join(root, f)))
+    with ThreadPoolExecutor(max_workers=MAX_ROOT_IO_WORKERS) as ex_io:
+        return dict(zip(folders, ex_io.map(lambda f: identify_folder(root, f), folders)))
+
+asset_data_list, short_strings_to_translate, desc_tasks, avatar_profiles = [], [], {}, {}
+new_root_meta, item_roots = {}, {}
+dirty_ids = set()
+
+# Legacy metadata is a flat {folder: meta} map belonging to the first root
+root_meta = global_meta.get("roots", {}) if "roots" in global_meta else {ROOT_FOLDERS[0]: global_meta}
+previous_roots = {} # Root each item resolved to last build, partitions are stored in configured order
+for r, part in root_meta.items():
+    for folder in part: previous_roots.setdefault(folder, r)
+online_roots = [r for r in ROOT_FOLDERS if os.path.isdir(r)]
+for r in ROOT_FOLDERS:
+    if r not in online_roots: logger.warning(f"[Build] Root '{r}' is unavailable, keeping its {len(root_meta.get(r, {}))} items from the last build.")
+
+logger.info(f"[Build] Identifying updates across {len(online_roots)} root(s)...")
+with ThreadPoolExecutor(max_workers=max(1, len(online_roots))) as ex_roots:
+    root_results = dict(zip(online_roots, ex_roots.map(scan_root, online_roots)))
+
+# Merge in configured root order so duplicate ids always resolve to the same root
+for root in ROOT_FOLDERS:
+    if root not in online_roots:
+        new_root_meta[root] = root_meta.get(root, {})
+        for folder in new_root_meta[root]: item_roots.setdefault(folder, root)
+        continue
+    new_root_meta[root] = {}
+    for folder, (meta_entry, needs_update, source) in root_results[root].items():
+        new_root_meta[root][folder] = meta_entry
+        if folder in item_roots:
+            logger.warning(f"[Build] Duplicate item '{folder}' in '{root}' ignored, already provided by '{item_roots[folder]}'.")
+            continue
+        item_roots[folder] = root
+        if not needs_update and previous_roots.get(folder) != root: # Provider changed, e.g. the earlier root's copy was removed
+            needs_update, source = True, read_item_source(folder, os.path.join(root, folder))
+        if not needs_update: continue
+        dirty_ids.add(folder)
+        if not source: continue
+        record, strings, desc = source
+        asset_data_list.append(record)
+        short_strings_to_translate.extend(strings)
+        if desc: desc_tasks[folder] = desc
+
+deleted_ids = [k for part in root_meta.values() for k in part if k not in item_roots]
+if deleted_ids:
+    logger.info(f"[Cleanup] Removing {len(deleted_ids)} items...")
+    for d_id in deleted_ids:
+        existing_database.pop(d_id, None)
+        description_cache.pop(d_id, None)
+        t_path = os.path.join(IMG_OUT_DIR, f"{d_id}_thumb.webp")
+        for f in {get_thumb_meta(d_id).get('file'), t_path, *published_versions(t_path)}:
+            if f and os.path.exists(f):
+                try: os.remove(f)
+                except OSError: pass
+        thumb_meta.pop(d_id, None)
+        similarity_cache.pop(d_id, None)
+        translation_ledger.pop(f"desc:{d_id}", None)
+        for f in glob.glob(os.path.join(GALLERY_OUT_DIR, f"{d_id}_*")):
+            try: os.remove(f)
+            except OSError: pass
+    try:
+        write_atomic(DESC_CACHE_FILE, json.dumps(description_cache, ensure_ascii=False, indent=2))
+        write_atomic(THUMB_META_FILE, json.dumps(thumb_meta))
+    except Exception:
+         logger.error(f"Failed to save cache during cleanup:\n{traceback.format_exc()}")
 
+# Original-language matching needs no translations, so it runs straight after ingestion
+logger.info("[Relate] Matching original Japanese names...")
+jp_profiles, orig_infos = {}, {}
+for item_id, item in existing_database.items():
+    orig_infos[item_id] = (item['nameOrig'], item['tags'], [], item['isAvatar'])
+for atype, folder, data, path, wish, is_avatar in asset_data_list:
+    name, author, content, desc = data
+    if atype == 'json': orig_infos[folder] = (name, [t.get('name', '') for t in content.get('tags', [])], [v.get('name', '') for v in content.get('variations', []) if v.get('name')], is_avatar)
+    elif atype == 'custom': orig_infos[folder] = (name, content.get('tags', []), [], is_avatar)
+    else: orig_infos[folder] = (name, [], [], is_avatar)
+for item_id, (name, tags, vars, is_av) in orig_infos.items():
+    if is_av: jp_profiles[item_id] = get_japanese_name_terms(item_id, name)
+jp_index = build_japanese_name_index(jp_profiles)
+jp_matches = {item_id: find_japanese_matches(info[:3], jp_index) - {item_id} for item_id, info in orig_infos.items() if not info[3]}
+del orig_infos
+
+recovered_terms = {}
 if not SKIP_TRANSLATION:
-    new_strs = [t for t in list(set(str(t).strip() for t in short_strings_to_translate if t and contains_japanese(t))) if t not in translation_cache]
+    term_counts, term_sources = {}, {} # The normalized key only addresses the cache, the backend sees a real original
+    for t in short_strings_to_translate:
+        if t and contains_japanese(t):
+            key = normalize_term(t)
+            term_counts[key] = term_counts.get(key, 0) + 1
+            term_sources.setdefault(key, str(t).strip())
+    wanted_strs = set(term_counts)
+    glossary_hits = {t for t in wanted_strs if glossary_term(t)}
+    for key in [k for k, e in translation_ledger.items() if e["kind"] == "term" and glossary_term(k[5:])]:
+        translation_ledger.pop(key)
+        recovered_terms[key[5:]] = glossary_term(key[5:])
+    new_strs = [t for t in wanted_strs - glossary_hits if t not in translation_cache and ledger_due(f"term:{t}")]
+    new_strs += [k[5:] for k, e in translation_ledger.items() if e["kind"] == "term" and k[5:] not in wanted_strs and ledger_due(k)]
+    stored_terms = {t: data.decode('utf-8') for t, data in ((t, artifact_get(artifact_key("term", text_digest(t)))) for t in new_strs) if data}
+    for t, trans in stored_terms.items():
+        translation_cache[t] = trans
+        if translation_ledger.pop(f"term:{t}", None): recovered_terms[t] = trans
+    new_strs = [t for t in new_strs if t not in stored_terms]
+    if wanted_strs:
+        from_artifacts, backend = sum(1 for t in stored_terms if t in wanted_strs), sum(1 for t in new_strs if t in wanted_strs)
+        cached = len(wanted_strs) - len(glossary_hits) - from_artifacts - backend
+        logger.info(f"[Translate] Glossary answered {len(glossary_hits)} of {len(wanted_strs)} terms ({len(glossary_hits) / len(wanted_strs):.1%}), {cached} cached, {from_artifacts} from artifacts, {backend} for the backend")
+        try:
+            write_atomic(GLOSSARY_STATS_FILE, json.dumps({
+                "terms": len(wanted_strs), "glossary": len(glossary_hits), "cached": cached, "artifacts": from_artifacts, "backend": backend,
+                "hitRate": round(len(glossary_hits) / len(wanted_strs), 4),
+                "entries": dict(sorted(((t, term_counts[t]) for t in glossary_hits), key=lambda e: (-e[1], e[0])))
+            }, ensure_ascii=False, indent=2))
+        except Exception: logger.error(f"Failed to save glossary stats:\n{traceback.format_exc()}")
     if new_strs:
         logger.info(f"[Translate] Processing {len(new_strs)} terms...")
         with ThreadPoolExecutor(max_workers=MAX_TRANSLATION_WORKERS) as ex_trans:
-            futures_trans = {ex_trans.submit(lambda x: (x, GoogleTranslator(source='auto', target='en').translate(x)), term): term for term in new_strs}
+            source_of = lambda key: term_sources.get(key) or translation_ledger.get(f"term:{key}", {}).get("source") or key
+            futures_trans = {ex_trans.submit(translate_unit, source_of(term)): term for term in new_strs}
             for i, f in enumerate(as_completed(futures_trans)): 
+                orig = futures_trans[f]
                 try:
-                    orig, trans = f.result()
-                    translation_cache[orig] = trans
-                except Exception:
-                    logger.error(f"Translation failed for term:\n{traceback.format_exc()}")
+                    translation_cache[orig] = f.result()
+                    artifact_put(artifact_key("term", text_digest(orig)), translation_cache[orig].encode('utf-8'))
+                    if translation_ledger.pop(f"term:{orig}", None): recovered_terms[orig] = translation_cache[orig]
+                except Exception as e:
+                    ledger_fail(f"term:{orig}", "term", classify_error(e), source=source_of(orig))
+                    logger.debug(f"Translation failed for term:\n{traceback.format_exc()}")
                 print_progress(i+1, len(new_strs), "Translate")
+        failed_terms = sum(1 for e in translation_ledger.values() if e["kind"] == "term")
+        logger.info(f"[Translate] {len(recovered_terms)} retried terms recovered, {failed_terms} terms pending retry")
+    if new_strs or stored_terms:
         try:
-            with open(CACHE_FILE, 'w', encoding='utf-8') as f: json.dump(translation_cache, f, ensure_ascii=False, indent=2)
+            write_atomic(CACHE_FILE, json.dumps(translation_cache, ensure_ascii=False, indent=2))
         except Exception:
              logger.error(f"Failed to save translation cache:\n{traceback.format_exc()}")
 
+# Unchanged items pick up recovered terms and glossary entries added since their last build
+patched = 0
+for item_id, item in existing_database.items():
+    if item_id in dirty_ids: continue
+    name_key, author_key = normalize_term(item['nameOrig']), normalize_term(item['authorOrig'])
+    name_trans, author_trans = glossary_term(name_key) or recovered_terms.get(name_key), glossary_term(author_key) or recovered_terms.get(author_key)
+    if not ((name_trans and name_trans != item['nameTrans']) or (author_trans and author_trans != item['authorTrans'])): continue
+    if name_trans: item['nameTrans'] = name_trans
+    if author_trans: item['authorTrans'] = author_trans
+    item['searchBlob'] = make_search_blob(item_id, item['nameOrig'], item['nameTrans'], item['authorOrig'], item['authorTrans'], item['tags'])
+    patched += 1
+if patched: logger.info(f"[Translate] Patched {patched} unchanged items with recovered or glossary terms")
+
 logger.info("[Relate] Building Avatar Profiles...")
 for item_id, item in existing_database.items():
     if item['isAvatar']:
@@ -901,7 +2021,7 @@ for atype, folder, data, path, wish, is_avatar in asset_data_list:
         tags_source = []
         if atype == 'json': tags_source = [t.get('name', '') for t in data[2].get('tags', [])]
         elif atype == 'custom': tags_source = data[2].get('tags', [])
-        avatar_profiles[folder] = get_avatar_search_profile(folder, data[0], translation_cache.get(data[0].strip(), ""), tags_source)
+        avatar_profiles[folder] = get_avatar_search_profile(folder, data[0], cached_translation(data[0]), tags_source)
 
 logger.info("[Relate] Scanning for relationships...")
 relation_map = {item_id: {'avatars': [], 'assets': []} for item_id in set(list(existing_database.keys()) + [a[1] for a in asset_data_list])}
@@ -911,25 +2031,29 @@ for item_id, item in existing_database.items():
             if item['isAvatar']: relation_map[item_id]['assets'].append(link_id)
             else: relation_map[item_id]['avatars'].append(link_id)
 
+new_records = {a[1]: a for a in asset_data_list}
 for item_id in relation_map:
     item_info, is_av, content = None, False, {}
-    found_in_new = False
-    for a_type, a_folder, a_data, a_path, a_wish, a_is_av in asset_data_list:
-        if a_folder == item_id:
-            found_in_new, is_av, name, author, content, desc = True, a_is_av, *a_data
-            t_name = (translation_cache.get(name.strip(), "") or name).lower()
-            if a_type == 'json':
-                t_tags = [(translation_cache.get(t.get('name', ''), '') or t.get('name', '')).lower() for t in content.get('tags', [])]
-                t_vars = [(translation_cache.get(v.get('name', ''), '') or v.get('name', '')).lower() for v in content.get('variations', []) if v.get('name')]
-            elif a_type == 'custom': t_tags, t_vars = [t.lower() for t in content.get('tags', [])], []
-            else: t_tags, t_vars = [], []
-            item_info = (t_name, t_tags, t_vars)
-            break
+    found_in_new = item_id in new_records
+    if found_in_new:
+        a_type, a_folder, a_data, a_path, a_wish, is_av = new_records[item_id]
+        name, author, content, desc = a_data
+        t_name = (cached_translation(name) or name).lower()
+        if a_type == 'json':
+            t_tags = [(cached_translation(t.get('name', '')) or t.get('name', '')).lower() for t in content.get('tags', [])]
+            t_vars = [(cached_translation(v.get('name', '')) or v.get('name', '')).lower() for v in content.get('variations', []) if v.get('name')]
+        elif a_type == 'custom': t_tags, t_vars = [t.lower() for t in content.get('tags', [])], []
+        else: t_tags, t_vars = [], []
+        item_info = (t_name, t_tags, t_vars)
     if not found_in_new and item_id in existing_database:
         db_item = existing_database[item_id]
         item_info, is_av = ((db_item.get('nameTrans') or db_item['nameOrig']).lower(), [t.lower() for t in db_item['tags']], []), db_item['isAvatar']
 
     if not item_info: continue
+    if found_in_new:
+        if a_type == 'json': update_similarity(item_id, name, [t.get('name', '') for t in content.get('tags', [])], [v.get('name', '') for v in content.get('variations', []) if v.get('name')])
+        else: update_similarity(item_id, name, content.get('tags', []) if a_type == 'custom' else [], [])
+    else: update_similarity(item_id, existing_database[item_id]['nameOrig'], existing_database[item_id]['tags'])
     if found_in_new and 'related_booth_ids' in content:
         for target_id in [str(x) for x in content['related_booth_ids']]:
             if target_id == item_id: continue
@@ -940,63 +2064,155 @@ for item_id in relation_map:
                 relation_map[item_id]['avatars'].append(target_id)
                 if target_id in relation_map: relation_map[target_id]['assets'].append(item_id)
     if not is_av:
-        for av_id, profile in avatar_profiles.items():
-            if av_id != item_id and check_english_match(item_info, profile):
-                relation_map[item_id]['avatars'].append(av_id)
-                if av_id in relation_map: relation_map[av_id]['assets'].append(item_id)
+        matched = set(jp_matches.get(item_id, ()))
+        matched.update(av_id for av_id, profile in avatar_profiles.items() if av_id != item_id and av_id not in matched and check_english_match(item_info, profile))
+        for av_id in sorted(matched):
+            relation_map[item_id]['avatars'].append(av_id)
+            if av_id in relation_map: relation_map[av_id]['assets'].append(item_id)
 
 assets_to_avatar = {k: sorted(list(set(v['avatars']))) for k, v in relation_map.items() if v['avatars']}
 avatar_to_assets = {k: sorted(list(set(v['assets']))) for k, v in relation_map.items() if v['assets']}
 
+logger.info("[Similar] Bucketing MinHash signatures...")
+signatures = {k: sig for k, sig in ((k, decode_minhash(v["sig"])) for k, v in similarity_cache.items() if isinstance(v, dict) and v["sig"] and k in relation_map) if sig}
+similar_map = find_similar_items(signatures)
+try:
+    write_atomic(SIMILARITY_CACHE_FILE, json.dumps(similarity_cache))
+except Exception: logger.error(f"Failed to save similarity cache:\n{traceback.format_exc()}")
+
+if not SKIP_TRANSLATION:
+    for key, entry in translation_ledger.items():
+        d_id = key[5:]
+        if entry["kind"] == "desc" and d_id not in desc_tasks and d_id in existing_database and ledger_due(key):
+            source = entry.get("source") or existing_database[d_id].get('descOrig', '')
+            if source: desc_tasks[d_id] = source
+
 if desc_tasks:
     logger.info(f"[Translate] Processing descriptions...")
+    desc_segments, desc_done, desc_failed, seg_jobs, stored_segments = {}, {}, {}, [], 0
+    for d_id, text in desc_tasks.items():
+        entry = translation_ledger.get(f"desc:{d_id}", {})
+        desc_segments[d_id] = split_segments(text)
+        desc_done[d_id] = {int(i): t for i, t in entry.get("done", {}).items()} if entry.get("source") == text else {}
+        for idx, seg in enumerate(desc_segments[d_id]):
+            if idx in desc_done[d_id]: continue
+            if not contains_japanese(seg): desc_done[d_id][idx] = seg; continue
+            stored = artifact_get(artifact_key("desc", text_digest(unicodedata.normalize('NFKC', seg))))
+            if stored: desc_done[d_id][idx] = stored.decode('utf-8'); stored_segments += 1
+            else: seg_jobs.append((d_id, idx, seg))
+    if stored_segments: logger.info(f"[Translate] {stored_segments} description segments restored from artifacts")
     with ThreadPoolExecutor(max_workers=MAX_TRANSLATION_WORKERS) as ex_desc:
-        f_to_f = {ex_desc.submit(translate_single_text, text): f for f, text in desc_tasks.items()}
+        f_to_f = {ex_desc.submit(translate_unit, seg): (d_id, idx) for d_id, idx, seg in seg_jobs}
         for i, f in enumerate(as_completed(f_to_f)):
-            try: description_cache[f_to_f[f]] = f.result()
-            except Exception: logger.error(f"Description translation failed:\n{traceback.format_exc()}")
-            print_progress(i+1, len(desc_tasks), "Translate")
+            d_id, idx = f_to_f[f]
+            try:
+                desc_done[d_id][idx] = f.result()
+                artifact_put(artifact_key("desc", text_digest(unicodedata.normalize('NFKC', desc_segments[d_id][idx]))), desc_done[d_id][idx].encode('utf-8'))
+            except Exception as e:
+                desc_failed[d_id] = classify_error(e)
+                logger.debug(f"Description translation failed:\n{traceback.format_exc()}")
+            print_progress(i+1, len(seg_jobs), "Translate")
+    for d_id, segments in desc_segments.items():
+        if d_id in desc_failed:
+            ledger_fail(f"desc:{d_id}", "desc", desc_failed[d_id], source=desc_tasks[d_id], done={str(i): t for i, t in desc_done[d_id].items()})
+            continue
+        description_cache[d_id] = '\n'.join(desc_done[d_id][i] for i in range(len(segments)))
+        translation_ledger.pop(f"desc:{d_id}", None)
+        if d_id not in dirty_ids and d_id in existing_database: existing_database[d_id]['descTrans'] = description_cache[d_id]
+    if desc_failed: logger.warning(f"[Translate] {len(desc_failed)} descriptions failed, segments scheduled for retry")
     try:
-        with open(DESC_CACHE_FILE, 'w', encoding='utf-8') as f: json.dump(description_cache, f, ensure_ascii=False, indent=2)
+        write_atomic(DESC_CACHE_FILE, json.dumps(description_cache, ensure_ascii=False, indent=2))
     except Exception: logger.error(f"Failed to save description cache:\n{traceback.format_exc()}")
 
+if not SKIP_TRANSLATION:
+    try:
+        write_atomic(TRANSLATION_LEDGER_FILE, json.dumps(translation_ledger, ensure_ascii=False, indent=2))
+    except Exception: logger.error(f"Failed to save translation ledger:\n{traceback.format_exc()}")
+
 logger.info(f"[Build] Compiling Database...")
 for atype, folder, data, path, wish, is_avatar in asset_data_list:
     links = avatar_to_assets.get(folder, []) if is_avatar else assets_to_avatar.get(folder, [])
     name, author, content, desc = data
-    if atype == 'json': existing_database[folder] = create_asset_data(folder, name, author, [img.get('original', '') for img in content.get('images', [])], content.get('url', ''), path, [t.get('name', '') for t in content.get('tags', [])], content.get('is_adult', False) or is_adult_content(name), wish, content.get('price', ''), description=desc, is_avatar=is_avatar, related_links=links)
-    elif atype == 'custom': existing_database[folder] = create_asset_data(folder, name, author, [], "", path, content.get('tags', []), content.get('is_adult', False) or is_adult_content(name), wish, content.get('price', 0), description=desc, is_avatar=is_avatar, related_links=links)
+    if atype == 'json': existing_database[folder] = create_asset_data(folder, name, author, [img.get('original', '') for img in content.get('images', [])], content.get('url', ''), path, [t.get('name', '') for t in content.get('tags', [])], content.get('is_adult', False), wish, content.get('price', ''), description=desc, is_avatar=is_avatar, related_links=links)
+    elif atype == 'custom': existing_database[folder] = create_asset_data(folder, name, author, [], "", path, content.get('tags', []), content.get('is_adult', False), wish, content.get('price', 0), description=desc, is_avatar=is_avatar, related_links=links)
     else:
         i_m, u_m = re.search(r'src=\"([^\"]+)\"', content), re.search(r'href=\"([^\"]+)\"', content)
-        existing_database[folder] = create_asset_data(folder, name, author, [i_m.group(1) if i_m else ""], u_m.group(1) if u_m else "", path, [], is_adult_content(name), 0, "", limited=True, related_links=links)
+        existing_database[folder] = create_asset_data(folder, name, author, [i_m.group(1) if i_m else ""], u_m.group(1) if u_m else "", path, [], False, 0, "", limited=True, related_links=links)
 
 for item_id in existing_database:
+    item = existing_database[item_id]
+    item['similar'] = similar_map.get(item_id, [])
     if item_id not in dirty_ids:
-        item = existing_database[item_id]
         new_links = avatar_to_assets.get(item_id, []) if item['isAvatar'] else assets_to_avatar.get(item_id, [])
         if set(new_links) != set(item.get('links', [])): item['links'] = new_links
 
-if OPTIMIZE_THUMBNAILS or OPTIMIZE_GALLERY:
-    thumb_tasks, gallery_tasks, scan_list = [], [], list(existing_database.values())
+# Databases from before the image index lack dimensions, fill them in from the folder index
+for item_id, item in existing_database.items():
+    if 'imageSizes' in item or item_roots.get(item_id) not in online_roots: continue
+    dims = {img['name']: [img['width'], img['height']] for img in get_image_index(os.path.join(item_roots[item_id], item_id))}
+    item['imageSizes'] = [dims.get(os.path.basename(from_web_path(p)), [0, 0]) for p in item['allImages']]
+
+# Items whose listing is missing or still a flat list from before the file tree are re-listed
+for item_id, item in existing_database.items():
+    tree = item.get('files')
+    if isinstance(tree, dict) and (tree.get("f") or tree.get("d") or not tree.get("n")): continue
+    if item_roots.get(item_id) in online_roots: item['files'] = get_dir_data(os.path.join(item_roots[item_id], item_id, 'Binary'))
+    else: item['files'] = {"b": item['bytes'], "n": item['fileCount']}
+
+# Booth's own flag or a filters.json keyword in the name, tags or description. Verdicts are cached per item content
+# version and filter list hash, so editing filters.json re-classifies in one pass without touching other stages.
+logger.info("[Filter] Classifying adult content...")
+adult_classifier = AdultClassifier(ADULT_FILTERS)
+cached_verdicts = adult_cache.get("items", {}) if adult_cache.get("filters") == adult_classifier.version else {}
+adult_verdicts, reclassified = {}, 0
+for item_id, item in existing_database.items():
+    texts = (item['nameOrig'], item['nameTrans'], "\n".join(t for t in item['tags'] if not t.startswith("⚙")), item.get('descOrig') or "", item.get('descTrans') or "")
+    version = "%08X" % (binascii.crc32("\x00".join(texts).encode('utf-8')) & 0xFFFFFFFF)
+    cached = cached_verdicts.get(item_id)
+    if cached and cached[0] == version: keyword = cached[1]
+    else: keyword = adult_classifier.match(*texts); reclassified += 1
+    adult_verdicts[item_id] = [version, keyword]
+    if 'adultSource' not in item: item['adultSource'] = bool(item['adult']) and not adult_classifier.match(item['nameOrig']) # Pre-classifier database
+    adult = bool(item['adultSource'] or keyword)
+    if item['adult'] != adult or item.get('adultKeyword') != keyword:
+        tags = [t for t in item['tags'] if t != "⚙Adult"] + (["⚙Adult"] if adult else [])
+        item['adult'], item['adultKeyword'], item['tags'] = adult, keyword, tags
+        item['searchBlob'] = make_search_blob(item_id, item['nameOrig'], item['nameTrans'], item['authorOrig'], item['authorTrans'], tags)
+if reclassified: logger.info(f"[Filter] Classified {reclassified} items, {sum(1 for it in existing_database.values() if it['adult'])} adult in total")
+try: write_atomic(ADULT_CACHE_FILE, json.dumps({"filters": adult_classifier.version, "items": adult_verdicts}, ensure_ascii=False))
+except Exception: logger.error(f"Failed to save adult filter cache:\n{traceback.format_exc()}")
+
+if OPTIMIZE_THUMBNAILS or OPTIMIZE_GALLERY or BLUR_LAYERS:
+    thumb_tasks, gallery_tasks, blur_tasks, adopted_thumbs, scan_list = [], [], {}, [], list(existing_database.values())
+    existing_blurs = set(os.listdir(BLUR_OUT_DIR)) if BLUR_LAYERS else set()
     logger.info(f"[Optimize] Scanning {len(scan_list)} items for changes...")
     def scan_item(item):
-        t_task, g_tasks = None, []
+        t_task, g_tasks, b_tasks = None, [], []
+        if item_roots.get(item['id']) not in online_roots: return t_task, g_tasks, b_tasks
         if OPTIMIZE_THUMBNAILS:
-            cur_thumb = unquote(item['gridThumb']).replace('/', os.sep)
-            if cur_thumb.startswith('web_data') and not os.path.exists(cur_thumb):
-                orig_folder = os.path.join(ROOT_FOLDER, item['id'])
-                local_files = [f for f in os.listdir(orig_folder) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.gif'))]
+            cur_thumb = from_web_path(item['gridThumb'])
+            if cur_thumb.startswith('web_data') and (not os.path.exists(cur_thumb) or cur_thumb != get_thumb_meta(item['id']).get('file') or not get_thumb_meta(item['id']).get('key')):
+                orig_folder = os.path.join(item_roots[item['id']], item['id'])
+                local_files = [img['name'] for img in get_image_index(orig_folder)]
                 if local_files: cur_thumb = os.path.join(orig_folder, local_files[0])
             if os.path.exists(cur_thumb) and not cur_thumb.startswith('web_data'):
-                crc = calculate_crc32(cur_thumb)
-                if crc and (thumb_meta.get(item['id']) != crc or not os.path.exists(os.path.join(IMG_OUT_DIR, f"{item['id']}_thumb.webp"))): t_task = (item, cur_thumb, crc)
-                else: item['gridThumb'] = quote(os.path.join(IMG_OUT_DIR, f"{item['id']}_thumb.webp").replace('\\', '/'))
+                crc = image_crc(cur_thumb)
+                meta = get_thumb_meta(item['id'])
+                if crc and (meta.get('crc') != crc or 'lqip' not in meta or not meta.get('file') or not os.path.exists(meta['file'])): t_task = (item, cur_thumb, crc)
+                elif meta.get('file'):
+                    item['gridThumb'], item['lqip'] = quote(meta['file'].replace('\\', '/')), meta.get('lqip', "")
+                    if not meta.get('key'): # Thumbnail from before the artifact store, adopt it once instead of re-encoding
+                        meta['key'] = artifact_key("thumb", file_digest(cur_thumb))
+                        with open(meta['file'], 'rb') as f: artifact_put(meta['key'], f.read())
+                        adopted_thumbs.append(item['id'])
         if OPTIMIZE_GALLERY:
-            new_gal, orig_folder = [], os.path.join(ROOT_FOLDER, item['id'])
-            local_srcs = sorted([f for f in os.listdir(orig_folder) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.gif'))])
-            for img_path in item['allImages']:
+            new_gal, new_sizes, orig_folder = [], [], os.path.join(item_roots[item['id']], item['id'])
+            local_srcs, sizes, size = [img['name'] for img in get_image_index(orig_folder)], item.get('imageSizes') or [], [0, 0]
+            for idx, img_path in enumerate(item['allImages']):
+                new_sizes += [size] * (len(new_gal) - len(new_sizes)) # Keep sizes aligned with the images kept last iteration
+                size = sizes[idx] if idx < len(sizes) else [0, 0]
                 img_path_unquoted = unquote(img_path)
-                local_p = img_path_unquoted.replace('/', os.sep)
+                local_p = from_web_path(img_path)
                 if 'web_data/img/gallery' in img_path_unquoted:
                     if os.path.exists(local_p): new_gal.append(img_path); continue
                     else:
@@ -1006,25 +2222,42 @@ if OPTIMIZE_THUMBNAILS or OPTIMIZE_GALLERY:
                             if orig_fn_part and src_f.startswith(orig_fn_part): local_p, found_src = os.path.join(orig_folder, src_f), True; break
                         if not found_src: continue
                 if os.path.exists(local_p) and not local_p.startswith('web_data'):
-                    crc = calculate_crc32(local_p)
+                    crc = image_crc(local_p)
                     if not crc: continue
                     file_name = os.path.basename(local_p)
                     opt_path = os.path.join(GALLERY_OUT_DIR, f"{item['id']}_{crc}_{os.path.splitext(file_name)[0]}.webp")
                     if not os.path.exists(opt_path): g_tasks.append((item, local_p, crc, len(new_gal))); new_gal.append(img_path)
                     else: new_gal.append(quote(opt_path.replace('\\', '/')))
                 else: new_gal.append(img_path)
-            item['allImages'] = new_gal
-        return t_task, g_tasks
+            new_sizes += [size] * (len(new_gal) - len(new_sizes))
+            item['allImages'], item['imageSizes'] = new_gal, new_sizes
+        if BLUR_LAYERS:
+            blurs = []
+            for img_path in item['allImages']:
+                local_p, crc = from_web_path(img_path), None
+                if 'web_data/img/gallery' in unquote(img_path):
+                    match = re.search(rf"{re.escape(item['id'])}_([A-F0-9]+)_", os.path.basename(local_p)) # Named after the source CRC
+                    crc = match.group(1) if match and os.path.exists(local_p) else None
+                elif os.path.exists(local_p) and not local_p.startswith('web_data'): crc = image_crc(local_p)
+                if crc and f"{crc}.webp" not in existing_blurs: b_tasks.append((crc, local_p, item, len(blurs)))
+                blurs.append(crc or "")
+            if item.get('blurs') != blurs: item['blurs'] = blurs
+        return t_task, g_tasks, b_tasks
 
     with ThreadPoolExecutor(max_workers=MAX_OPTIMIZATION_WORKERS) as ex_scan:
         f_scan = [ex_scan.submit(scan_item, it) for it in scan_list]
         for i, f in enumerate(as_completed(f_scan)):
             try:
-                t, g = f.result()
+                t, g, b = f.result()
                 if t: thumb_tasks.append(t)
                 gallery_tasks.extend(g)
+                for crc, path, item, idx in b: blur_tasks.setdefault(crc, (path, []))[1].append((item, idx))
             except Exception: logger.error(f"Error scanning item:\n{traceback.format_exc()}")
             print_progress(i+1, len(scan_list), "Scan")
+    if adopted_thumbs:
+        logger.info(f"[Artifacts] Stored {len(adopted_thumbs)} existing thumbnails")
+        try: write_atomic(THUMB_META_FILE, json.dumps(thumb_meta))
+        except Exception: logger.error(f"Failed to save thumbnail meta:\n{traceback.format_exc()}")
 
     with ThreadPoolExecutor(max_workers=MAX_OPTIMIZATION_WORKERS) as ex_opt:
         if thumb_tasks:
@@ -1032,37 +2265,104 @@ if OPTIMIZE_THUMBNAILS or OPTIMIZE_GALLERY:
             f_thumbs = {ex_opt.submit(get_optimized_thumb, t[0]['id'], t[1], t[2]): t for t in thumb_tasks}
             for i, f in enumerate(as_completed(f_thumbs)):
                 try:
-                    res, crc = f.result()
+                    res, crc, lqip, key = f.result()
                     item = f_thumbs[f][0]
-                    item['gridThumb'] = res
-                    if crc: thumb_meta[item['id']] = crc
+                    item['gridThumb'], item['lqip'] = res, lqip
+                    if crc: thumb_meta[item['id']] = {"crc": crc, "lqip": lqip, "file": from_web_path(res), "key": key}
                 except Exception: logger.error(f"Thumbnail optimization failed:\n{traceback.format_exc()}")
                 print_progress(i+1, len(thumb_tasks), "Optimize")
             try:
-                with open(THUMB_META_FILE, 'w', encoding='utf-8') as f: json.dump(thumb_meta, f)
+                write_atomic(THUMB_META_FILE, json.dumps(thumb_meta))
             except Exception: logger.error(f"Failed to save thumbnail meta:\n{traceback.format_exc()}")
         if gallery_tasks:
             logger.info(f"[Optimize] Processing {len(gallery_tasks)} gallery images...")
             f_gal = {ex_opt.submit(get_optimized_gallery_img, g[0]['id'], g[1], g[2]): g for g in gallery_tasks}
             for i, f in enumerate(as_completed(f_gal)):
                 try:
-                    res = f.result()
+                    res, key = f.result()
                     item, _, _, idx = f_gal[f]
                     item['allImages'][idx] = res
+                    if key: gallery_artifacts[os.path.basename(from_web_path(res))] = key
                 except Exception: logger.error(f"Gallery optimization failed:\n{traceback.format_exc()}")
                 print_progress(i+1, len(gallery_tasks), "Optimize")
+        if blur_tasks:
+            logger.info(f"[Optimize] Creating {len(blur_tasks)} carousel blur layers...")
+            f_blur = {ex_opt.submit(get_blur_layer, path, crc): crc for crc, (path, _) in blur_tasks.items()}
+            for i, f in enumerate(as_completed(f_blur)):
+                try: f.result()
+                except Exception:
+                    logger.debug(f"Blur layer failed:\n{traceback.format_exc()}")
+                    for item, idx in blur_tasks[f_blur[f]][1]: item['blurs'] = [b if j != idx else "" for j, b in enumerate(item['blurs'])] # Page falls back to blurring the full image
+                print_progress(i+1, len(blur_tasks), "Optimize")
+    if BLUR_LAYERS:
+        referenced = {f"{crc}.webp" for it in existing_database.values() for crc in it.get('blurs') or ()}
+        for name in existing_blurs - referenced:
+            try: os.remove(os.path.join(BLUR_OUT_DIR, name))
+            except OSError: pass
 
-keys_to_remove = [k for k in existing_database if k not in current_folders]
+keys_to_remove = [k for k in existing_database if k not in item_roots]
 for k in keys_to_remove: del existing_database[k]
 
+item_folders = {os.path.join(item_roots[k], k) for k in existing_database}
+try: write_atomic(IMAGE_INDEX_FILE, json.dumps({k: v for k, v in sorted(image_index.items()) if k in item_folders}, ensure_ascii=False))
+except Exception: logger.error(f"Failed to save image index:\n{traceback.format_exc()}")
+
+logger.info("[Dedupe] Indexing Binary file contents...")
+file_entries = [(item_id, os.path.join(item_roots[item_id], item_id, 'Binary', *parts), item_roots[item_id] in online_roots)
+                for item_id, item in existing_database.items() for parts, _ in iter_tree_files(item['files'])]
+duplicate_groups, content_index = build_content_index(file_entries)
+del file_entries
+file_dupes = {}
+for size, members in duplicate_groups:
+    ids = sorted({item_id for item_id, _ in members})
+    for item_id, path in members:
+        others = [i for i in ids if i != item_id]
+        if others: file_dupes[path] = others
+for item_id, item in existing_database.items():
+    tree, changed, base = item.thaw('files'), False, os.path.join(item_roots[item_id], item_id, 'Binary')
+    for parts, entry in iter_tree_files(tree):
+        dupes = file_dupes.get(os.path.join(base, *parts))
+        if dupes != (entry[2] if len(entry) > 2 else None):
+            del entry[2:]
+            if dupes: entry.append(dupes)
+            changed = True
+    if changed: item['files'] = tree
+if duplicate_groups:
+    reclaimable = sum(size * (len(members) - 1) for size, members in duplicate_groups)
+    logger.info(f"[Dedupe] {len(duplicate_groups)} duplicate groups, {get_readable_size(reclaimable)} reclaimable")
+    for size, members in sorted(duplicate_groups, key=lambda g: -g[0] * (len(g[1]) - 1))[:10]:
+        logger.info(f"[Dedupe]   {get_readable_size(size)} x{len(members)} {os.path.basename(members[0][1])} ({', '.join(sorted({i for i, _ in members}))})")
+try: write_atomic(CONTENT_INDEX_FILE, json.dumps(content_index, ensure_ascii=False))
+except Exception: logger.error(f"Failed to save content index:\n{traceback.format_exc()}")
+
 try:
-    with open(DATABASE_JS_FILE, 'w', encoding='utf-8') as f: 
-        f.write("window.BOOTH_DATABASE = "); json.dump(list(existing_database.values()), f, ensure_ascii=False); f.write(";")
-    with open(GLOBAL_META_FILE, 'w', encoding='utf-8') as f: json.dump(new_global_meta, f)
+    def dump_database(f):
+        f.write("window.BOOTH_DATABASE = "); json.dump(list(existing_database.values()), f, ensure_ascii=False, default=ItemRecord.to_dict); f.write(";")
+    file_shards = file_shard_count(len(existing_database), db_manifest.get("fileShards"))
+    file_lists = write_file_lists(file_shards)
+    database_snapshot = publish_hashed(DATABASE_JS_FILE, dump_database).replace('\\', '/')
+    write_database_delta(list(existing_database.values()), database_snapshot, file_lists)
+    write_atomic(GLOBAL_META_FILE, json.dumps({"roots": new_root_meta}))
     final_html = (HTML_TEMPLATE
                   .replace("__L18N_INJECT_POINT__", json.dumps(l18n_data, ensure_ascii=False))
                   .replace("__REMOVABLES_INJECT_POINT__", json.dumps(STRINGS_TO_REMOVE, ensure_ascii=False))
-                  .replace("__DATABASE_FILE_INJECT_POINT__", DATABASE_JS_FILE))
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f: f.write(final_html)
+                  .replace("__DATABASE_FILE_INJECT_POINT__", database_snapshot)
+                  .replace("__FILE_LISTS_INJECT_POINT__", json.dumps(file_lists))
+                  .replace("__MANIFEST_FILE_INJECT_POINT__", MANIFEST_JS_FILE)
+                  .replace("__BLUR_DIR_INJECT_POINT__", BLUR_OUT_DIR + "/"))
+    write_atomic(OUTPUT_FILE, final_html)
+    remove_retired_versions()
+    prune_artifacts()
     logger.info(f"--- Library Updated Successfully ({len(existing_database)} items) ---")
-except Exception: logger.error(f"Critical failure saving database:\n{traceback.format_exc()}")
\ No newline at end of file
+except Exception: logger.error(f"Critical failure saving database:\n{traceback.format_exc()}")
+
+if cli_args.export_artifacts:
+    # Translations from before the artifact store: terms and single-segment descriptions map back to their source
+    for term, trans in translation_cache.items():
+        if trans and TRANSLATION_ERROR_MARKER not in str(trans): artifact_put(artifact_key("term", text_digest(term)), str(trans).encode('utf-8'))
+    for item_id, item in existing_database.items():
+        trans, segments = description_cache.get(item_id), split_segments(item.get('descOrig') or '')
+        if trans and len(segments) == 1 and contains_japanese(segments[0]):
+            artifact_put(artifact_key("desc", text_digest(unicodedata.normalize('NFKC', segments[0]))), trans.encode('utf-8'))
+    try: export_artifacts(cli_args.export_artifacts)
+    except Exception: logger.error(f"Could not export artifact pack {cli_args.export_artifacts}:\n{traceback.format_exc()}")
\ No newline at end of file